@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+from bson import json_util
+from app.core.config import Settings
+
+class CacheBackend():
+    """Interface d'un backend de cache clé/valeur avec expiration"""
+    async def get(self, key: str) -> dict | None:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: dict, ttl: int):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+class MemoryCacheBackend(CacheBackend):
+    """Cache LRU en mémoire, borné en taille, propre à chaque worker"""
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    async def get(self, key: str) -> dict | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict, ttl: int):
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+class RedisCacheBackend(CacheBackend):
+    """Cache partagé entre workers (nécessite le paquet redis)"""
+    def __init__(self, url: str, prefix: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("USER_CACHE_BACKEND=redis nécessite le paquet 'redis'") from e
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> dict | None:
+        value = await self.client.get(self.prefix + key)
+        return json_util.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: dict, ttl: int):
+        # json_util conserve les types BSON (dates) des documents projetés
+        await self.client.set(self.prefix + key, json_util.dumps(value), ex=ttl)
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def close(self):
+        await self.client.aclose()
+
+class UserCache():
+    """Cache des utilisateurs authentifiés, indexé par le `sub` du JWT"""
+    def __init__(self, settings: Settings):
+        self.enabled = settings.USER_CACHE_ENABLED
+        self.ttl = settings.USER_CACHE_TTL_SECONDS
+        if settings.USER_CACHE_BACKEND == "redis":
+            self.backend = RedisCacheBackend(settings.REDIS_URL, prefix="auth:user:")
+        else:
+            self.backend = MemoryCacheBackend(settings.USER_CACHE_MAX_SIZE)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, email: str) -> dict | None:
+        if not self.enabled:
+            return None
+        value = await self.backend.get(email)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, email: str, user: dict):
+        if self.enabled:
+            await self.backend.set(email, user, self.ttl)
+
+    async def invalidate(self, email: str | None):
+        if self.enabled and email:
+            self.invalidations += 1
+            await self.backend.delete(email)
+
+    async def close(self):
+        if isinstance(self.backend, RedisCacheBackend):
+            await self.backend.close()
+
+    def get_stats(self) -> dict:
+        stats = {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+        if isinstance(self.backend, MemoryCacheBackend):
+            stats["size"] = len(self.backend)
+        return stats
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -11,6 +12,101 @@ class Settings(BaseSettings):
     SECRET_KEY_JWT: str
     ALGORITHM: str
     ENVIRONMENT: str = "development"  # "development" ou "production"
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    MONGODB_DB_NAME: str = "volleyball-db-local"
+
+    # Pool de connexions MongoDB
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: int | None = None
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int | None = None
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int | None = None
+
+    # Pool de hachage des mots de passe (None = min(4, nombre de CPU))
+    HASH_MAX_WORKERS: int | None = None
+    HASH_QUEUE_DEPTH: int = 32
+
+    # Politique de hachage ("bcrypt" ou "argon2", qui nécessite argon2-cffi).
+    # Valeurs à calibrer avec `python -m app.services.hashing calibrate` ;
+    # les hashes d'un autre schéma ou d'un autre coût sont refaits à la connexion
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_REHASH_ON_LOGIN: bool = True
+
+    # Cache des utilisateurs pour get_current_user ("memory" ou "redis")
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_BACKEND: str = "memory"
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    REDIS_URL: str | None = None
+
+    # Clés asymétriques (RS256/ES256/EdDSA) : un fichier <kid>.pem par clé
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KID: str | None = None
+    JWT_ISSUER: str | None = None
+    JWKS_MAX_AGE_SECONDS: int = 300
+
+    # Cache des JWT déjà vérifiés
+    JWT_DECODE_CACHE_ENABLED: bool = True
+    JWT_DECODE_CACHE_SIZE: int = 10000
+
+    # Métadonnées des providers OAuth (discovery OIDC + JWKS)
+    GOOGLE_DISCOVERY_URL: str = "https://accounts.google.com/.well-known/openid-configuration"
+    OAUTH_METADATA_TTL_SECONDS: int = 3600
+    OAUTH_JWKS_MIN_REFRESH_SECONDS: int = 60
+    OAUTH_HTTP_TIMEOUT_SECONDS: float = 5.0
+
+    # File de révocation des tokens OAuth
+    REVOCATION_WORKERS: int = 4
+    REVOCATION_MAX_ATTEMPTS: int = 5
+    REVOCATION_RETRY_BASE_SECONDS: float = 2.0
+    REVOCATION_LEASE_SECONDS: int = 60
+    REVOCATION_RECOVERY_INTERVAL_SECONDS: int = 60
+
+    # Limitation des tentatives de connexion ("memory" ou "mongo" pour partager entre workers)
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 30
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 10
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    # Derrière un load balancer, l'adresse du pair TCP est celle du proxy : l'IP du
+    # client est lue dans cet en-tête (ex. "X-Forwarded-For"), jamais sans réglage
+    # explicite (l'en-tête est falsifiable quand aucun proxy ne le réécrit)
+    CLIENT_IP_HEADER: str | None = None
+    # Nombre de proxys de confiance qui ajoutent chacun une entrée à CLIENT_IP_HEADER
+    CLIENT_IP_TRUSTED_PROXIES: int = 1
+
+    # Import/export en masse (routes /admin, désactivées sans clé)
+    ADMIN_API_KEY: str | None = None
+    BULK_IMPORT_CHUNK_SIZE: int = 500
+    BULK_IMPORT_MAX_LINE_BYTES: int = 65536
+    BULK_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    BULK_EXPORT_BATCH_SIZE: int = 1000
+
+    # Expiration des abonnements ("deactivate" : status à False, "downgrade" : passage en FREE)
+    SUBSCRIPTION_SWEEP_ENABLED: bool = True
+    SUBSCRIPTION_SWEEP_INTERVAL_SECONDS: int = 300
+    SUBSCRIPTION_SWEEP_CHUNK_SIZE: int = 500
+    SUBSCRIPTION_SWEEP_LEASE_SECONDS: int = 120
+    SUBSCRIPTION_EXPIRY_ACTION: str = "deactivate"
+
+    # Introspection des tokens par les services internes (route fermée sans clé)
+    INTERNAL_API_KEY: str | None = None
+    INTROSPECT_MAX_TOKENS: int = 100
+
+    # Démarrage : "eager" (pool MongoDB ouvert, index créés et métadonnées OAuth
+    # préchargées avant la première requête) ou "lazy" (tout au premier usage)
+    STARTUP_MODE: str = "eager"
+    # En mode lazy, attente maximale des index uniques users avant de refuser (503)
+    # une inscription, une connexion OAuth ou un import
+    STARTUP_INDEX_WAIT_SECONDS: float = 5
 
     model_config = SettingsConfigDict(env_file=".env")
     
@@ -19,3 +115,8 @@ class Settings(BaseSettings):
         """Retourne True si l'environnement est en production"""
         return self.ENVIRONMENT.lower() == "production"
 
+
+@lru_cache
+def get_settings() -> Settings:
+    """Retourne l'unique instance de Settings (le .env n'est lu qu'une fois)"""
+    return Settings()
@@ -0,0 +1,142 @@
+import asyncio
+from functools import cached_property
+from app.core.cache import UserCache
+from app.core.config import Settings
+from app.core.database import Database
+from app.core.keys import KeyStore
+from app.repositories.refresh_token import RefreshTokenRepository
+from app.repositories.user import DuplicateUsersError, UserRepository
+from app.services.bulk_users import BulkUserService
+from app.services.hashing import PasswordHasher
+from app.services.jobs import RevocationQueue
+from app.services.oauth import OAuthService
+from app.services.rate_limit import LoginRateLimiter
+from app.services.refresh_token import RefreshTokenService
+from app.services.subscription_sweeper import SubscriptionSweeper
+from app.services.token import TokenService
+
+class Container():
+    """Dépendances partagées par toute l'application, une seule instance par worker.
+
+    Créé dans le lifespan FastAPI puis injecté dans les routeurs. Les clients
+    OAuth (Authlib, httpx) ne sont construits qu'au premier accès ; avec
+    STARTUP_MODE=lazy, le démarrage n'attend ni MongoDB ni les providers.
+    """
+    # Délai entre deux tentatives de création des index en mode lazy (doublé à chaque échec)
+    startup_retry_base = 1.0
+    startup_retry_max = 60.0
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.database = Database(settings)
+        self.users = UserRepository(self.database, settings.STARTUP_INDEX_WAIT_SECONDS)
+        self.hasher = PasswordHasher(settings)
+        self.user_cache = UserCache(settings)
+        self.keys = KeyStore(settings)
+        self.tokens = TokenService(settings, self.keys)
+        self.oauth = OAuthService(settings, self.users, self.hasher, self.user_cache, self.tokens)
+        self.refresh_token_repository = RefreshTokenRepository(self.database)
+        self.refresh_tokens = RefreshTokenService(settings, self.refresh_token_repository, self.users)
+        self.revocations = RevocationQueue(settings, self.database, lambda: self.oauth_provider)
+        self.login_rate_limiter = LoginRateLimiter(settings, self.database)
+        self.bulk_users = BulkUserService(settings, self.users, self.hasher)
+        self.subscription_sweeper = SubscriptionSweeper(settings, self.database, self.users, self.user_cache)
+        self.startup_task = None
+
+    @cached_property
+    def provider_metadata(self):
+        from app.services.provider_metadata import ProviderMetadataCache
+        provider_metadata = ProviderMetadataCache(self.settings)
+        if self.settings.STARTUP_MODE == "lazy":
+            # Construit à la première connexion OAuth : pas de préchargement, mais
+            # le rafraîchissement périodique démarre comme en mode eager
+            provider_metadata.start_refresh_loop()
+        return provider_metadata
+
+    @cached_property
+    def oauth_provider(self):
+        from app.services.oauth_provider import OAuthProviderService
+        return OAuthProviderService(self.settings, self.provider_metadata)
+
+    async def _ensure_indexes(self):
+        await self.refresh_token_repository.ensure_indexes()
+        await self.revocations.ensure_indexes()
+        await self.login_rate_limiter.ensure_indexes()
+        # En dernier : des doublons existants bloquent l'index unique, pas les autres
+        await self.users.ensure_indexes()
+
+    async def _ensure_indexes_in_background(self):
+        """Crée les index, en réessayant jusqu'au succès (MongoDB pas encore joignable)"""
+        failures = 0
+        while True:
+            try:
+                await self._ensure_indexes()
+                return
+            except DuplicateUsersError as e:
+                # Réessayer ne corrige pas les données : les créations de compte
+                # restent refusées (503) jusqu'au dédoublonnage et au redémarrage
+                print(f"ERREUR: index users non créés, créations de compte refusées. {str(e)}")
+                return
+            except Exception as e:
+                delay = min(self.startup_retry_max, self.startup_retry_base * 2 ** failures)
+                failures += 1
+                print(f"Erreur de création des index, nouvel essai dans {delay:.1f} s: {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def startup(self):
+        if self.settings.STARTUP_MODE == "lazy":
+            # Pas de pings ni de préchargement : le pool MongoDB s'ouvre à la première
+            # requête. Les workers en mémoire démarrent tout de suite, les index sont
+            # créés en tâche de fond.
+            await self.revocations.start()
+            await self.subscription_sweeper.start()
+            self.startup_task = asyncio.create_task(self._ensure_indexes_in_background())
+            return
+        await self.database.connect()
+        await self._ensure_indexes()
+        # Les sources du cache sont déclarées par OAuthProviderService : il doit
+        # exister avant le préchargement, sinon rien n'est chargé
+        self.oauth_provider
+        await self.provider_metadata.start()
+        await self.revocations.start()
+        await self.subscription_sweeper.start()
+
+    async def shutdown(self):
+        if self.startup_task is not None:
+            self.startup_task.cancel()
+            await asyncio.gather(self.startup_task, return_exceptions=True)
+        await self.subscription_sweeper.stop()
+        await self.revocations.stop()
+        if "provider_metadata" in self.__dict__:
+            await self.provider_metadata.stop()
+        self.hasher.shutdown()
+        await self.user_cache.close()
+        await self.database.close()
+
+    def get_metrics(self) -> dict:
+        """Statistiques numériques aplaties en gauges pour /metrics"""
+        metrics = {}
+
+        def flatten(prefix: str, value):
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    flatten(f"{prefix}_{key}", item)
+            elif isinstance(value, (bool, int, float)):
+                metrics[prefix] = int(value) if isinstance(value, bool) else value
+
+        flatten("auth", self.get_stats())
+        return metrics
+
+    def get_stats(self) -> dict:
+        return {
+            "mongodb_pool": self.database.get_pool_stats(),
+            "password_hashing": self.hasher.get_stats(),
+            "user_cache": self.user_cache.get_stats(),
+            "jwt_decode_cache": self.tokens.get_stats(),
+            # Absent tant qu'aucun client OAuth n'a été construit
+            "provider_metadata": self.provider_metadata.get_stats() if "provider_metadata" in self.__dict__ else {},
+            "revocations": self.revocations.get_stats(),
+            "login_rate_limit": self.login_rate_limiter.get_stats(),
+            "subscription_sweeper": self.subscription_sweeper.get_stats(),
+            "user_indexes_ready": self.users.indexes_ready.is_set(),
+        }
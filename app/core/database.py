@@ -1,14 +1,116 @@
-from pymongo import MongoClient
+import asyncio
+from pymongo import AsyncMongoClient, monitoring
 from app.core.config import Settings
+from app.core.metrics import mongo_command_duration
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Compte les événements du pool de connexions pour exposer des statistiques"""
+    def __init__(self):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.check_out_failed = 0
+        self.in_use = 0
+        self.cleared = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.check_out_failed += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.in_use += 1
+
+    def connection_checked_in(self, event):
+        self.in_use -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            "open": self.created - self.closed,
+            "in_use": self.in_use,
+            "created": self.created,
+            "closed": self.closed,
+            "checked_out": self.checked_out,
+            "check_out_failed": self.check_out_failed,
+            "cleared": self.cleared,
+        }
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Durée de chaque commande MongoDB, par collection et par commande"""
+    def __init__(self):
+        self.pending = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self.pending[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def _record(self, event, outcome: str):
+        collection = self.pending.pop((event.connection_id, event.request_id), "")
+        mongo_command_duration.observe(
+            collection, event.command_name, outcome, value=event.duration_micros / 1_000_000
+        )
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
 
 class Database:
     def __init__(self, settings: Settings):
-        self.client = MongoClient(settings.MONGODB_URI)
-        self.db = self.client["volleyball-db-local"]
+        self.settings = settings
+        self.pool_stats = PoolStatsListener()
+        # Client asynchrone : les requêtes ne bloquent pas la boucle d'événements
+        self.client = AsyncMongoClient(
+            settings.MONGODB_URI,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+            connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[self.pool_stats, MongoCommandMetrics()],
+        )
+        self.db = self.client[settings.MONGODB_DB_NAME]
         self.users_collection = self.db["users"]
 
     def get_db(self):
         return self.db
     
     def get_users_collection(self):
-        return self.users_collection
\ No newline at end of file
+        return self.users_collection
+
+    async def connect(self):
+        """Ouvre le pool au démarrage : pings concurrents pour créer minPoolSize connexions"""
+        warm = max(1, self.settings.MONGODB_MIN_POOL_SIZE)
+        await asyncio.gather(*(self.client.admin.command("ping") for _ in range(warm)))
+
+    def get_pool_stats(self) -> dict:
+        return self.pool_stats.get_stats()
+
+    async def close(self):
+        await self.client.close()
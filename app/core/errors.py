@@ -0,0 +1,17 @@
+"""Exceptions métier traduites en réponses HTTP par main.py.
+
+Module sans dépendance : main l'importe sans charger pymongo ni passlib.
+"""
+
+class HasherSaturatedError(Exception):
+    """Levée quand le pool de hachage et sa file d'attente sont pleins"""
+    pass
+
+class ServiceNotReadyError(Exception):
+    """Levée quand une écriture dépend d'un index unique pas encore créé"""
+    pass
+
+class RateLimitExceeded(Exception):
+    """Levée quand une clé dépasse sa limite, `retry_after` en secondes"""
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
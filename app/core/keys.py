@@ -0,0 +1,103 @@
+import argparse
+import json
+from pathlib import Path
+from jwt.algorithms import get_default_algorithms
+from app.core.config import Settings
+
+class KeyStore():
+    """Clés de signature des JWT.
+
+    - Algorithme HS* : signature avec SECRET_KEY_JWT, aucun JWKS publié.
+    - RS256/ES256/EdDSA : chaque fichier `<kid>.pem` de JWT_KEYS_DIR est une clé
+      privée. La clé JWT_ACTIVE_KID signe les nouveaux tokens, toutes les clés du
+      dossier restent acceptées et publiées dans le JWKS.
+
+    Rotation : ajouter la nouvelle clé au dossier (elle est publiée), basculer
+    JWT_ACTIVE_KID, puis retirer l'ancienne une fois ses tokens expirés.
+    """
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.algorithm = settings.ALGORITHM
+        self.is_symmetric = self.algorithm.upper().startswith("HS")
+        self.private_keys = {}
+        self.active_kid = None
+        if not self.is_symmetric:
+            self.load()
+
+    def load(self):
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+        if not self.settings.JWT_KEYS_DIR:
+            raise RuntimeError(f"JWT_KEYS_DIR est requis avec l'algorithme {self.algorithm}")
+        paths = sorted(Path(self.settings.JWT_KEYS_DIR).glob("*.pem"), key=lambda path: path.stat().st_mtime)
+        if not paths:
+            raise RuntimeError(f"Aucune clé .pem dans {self.settings.JWT_KEYS_DIR}")
+        self.private_keys = {
+            path.stem: load_pem_private_key(path.read_bytes(), password=None)
+            for path in paths
+        }
+        # Par défaut la clé la plus récente signe
+        self.active_kid = self.settings.JWT_ACTIVE_KID or paths[-1].stem
+        if self.active_kid not in self.private_keys:
+            raise RuntimeError(f"JWT_ACTIVE_KID inconnu : {self.active_kid}")
+
+    def get_signing_key(self):
+        """Retourne (kid, clé) pour signer un nouveau token"""
+        if self.is_symmetric:
+            return None, self.settings.SECRET_KEY_JWT
+        return self.active_kid, self.private_keys[self.active_kid]
+
+    def get_verification_key(self, kid: str | None):
+        """Retourne la clé publique correspondant au `kid`, None si inconnue"""
+        if self.is_symmetric:
+            return self.settings.SECRET_KEY_JWT
+        private_key = self.private_keys.get(kid)
+        return private_key.public_key() if private_key else None
+
+    def get_jwks(self) -> dict:
+        if self.is_symmetric:
+            return {"keys": []}
+        algorithm = get_default_algorithms()[self.algorithm]
+        keys = []
+        for kid, private_key in self.private_keys.items():
+            jwk = algorithm.to_jwk(private_key.public_key(), as_dict=True)
+            jwk.update({"kid": kid, "alg": self.algorithm, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
+
+def generate_key(algorithm: str):
+    """Génère une clé privée PEM pour l'algorithme donné"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if algorithm.startswith("RS") or algorithm.startswith("PS"):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Algorithme non supporté : {algorithm}")
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+if __name__ == "__main__":
+    # python -m app.core.keys generate --kid 2026-10 --algorithm RS256 --dir keys/
+    parser = argparse.ArgumentParser(description="Gestion des clés de signature JWT")
+    parser.add_argument("command", choices=["generate"])
+    parser.add_argument("--kid", required=True)
+    parser.add_argument("--algorithm", default="RS256")
+    parser.add_argument("--dir", default="keys")
+    args = parser.parse_args()
+
+    directory = Path(args.dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{args.kid}.pem"
+    if path.exists():
+        raise SystemExit(f"{path} existe déjà")
+    path.write_bytes(generate_key(args.algorithm))
+    path.chmod(0o600)
+    print(json.dumps({"kid": args.kid, "algorithm": args.algorithm, "path": str(path)}))
@@ -0,0 +1,170 @@
+import time
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("auth-service")
+except ImportError:
+    # Traces optionnelles : actives seulement si opentelemetry est installé
+    _tracer = None
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter():
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram():
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}  # labels -> [compteurs par bucket, somme, total]
+
+    def observe(self, *label_values, value: float):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in self.values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labels + ("le",), label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labels + ("le",), label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry():
+    """Registre des métriques exposées sur /metrics au format texte Prometheus"""
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name: str, documentation: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """`collector()` retourne un dict {nom: valeur} exporté en gauges au moment du scrape"""
+        self.collectors.append(collector)
+
+    def unregister_collector(self, collector):
+        self.collectors.remove(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, value in collector().items():
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "auth_http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "route", "status")
+)
+http_requests = registry.counter(
+    "auth_http_requests_total", "Nombre de requêtes HTTP", ("method", "route", "status")
+)
+mongo_command_duration = registry.histogram(
+    "auth_mongo_command_duration_seconds", "Durée des commandes MongoDB", ("collection", "command", "outcome")
+)
+operation_duration = registry.histogram(
+    "auth_operation_duration_seconds", "Durée des opérations coûteuses (bcrypt, JWT, providers)", ("operation",)
+)
+
+@contextmanager
+def span(name: str):
+    """Span OpenTelemetry si la bibliothèque est installée, sinon sans effet"""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name) as current_span:
+        yield current_span
+
+@contextmanager
+def timed(operation: str):
+    """Mesure la durée d'une opération (histogramme + span)"""
+    started = time.perf_counter()
+    try:
+        with span(operation):
+            yield
+    finally:
+        operation_duration.observe(operation, value=time.perf_counter() - started)
+
+class MetricsMiddleware():
+    """Middleware ASGI : latence et statut par route (chemin du template, pas l'URL brute)"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # Nom de span borné : la méthode seule tant que la route n'est pas résolue,
+        # jamais le chemin brut (identifiants, tokens dans l'URL)
+        with span(scope["method"]) as current_span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # FastAPI renseigne scope["route"] une fois la route résolue
+                route = scope.get("route")
+                route_path = getattr(route, "path", "unmatched")
+                status = str(status_code)
+                if current_span is not None:
+                    if route is not None:
+                        current_span.update_name(f"{scope['method']} {route_path}")
+                    current_span.set_attribute("http.route", route_path)
+                    current_span.set_attribute("http.response.status_code", status_code)
+                http_request_duration.observe(scope["method"], route_path, status, value=time.perf_counter() - started)
+                http_requests.inc(scope["method"], route_path, status)
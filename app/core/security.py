@@ -0,0 +1,15 @@
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException, status
+from app.core.config import get_settings
+
+def require_api_key(setting_name: str, header: str):
+    """Dépendance FastAPI : 403 si l'en-tête `header` ne correspond pas au réglage `setting_name`.
+
+    Sans clé configurée, les routes protégées sont fermées.
+    """
+    def check_api_key(api_key: Optional[str] = Header(None, alias=header)):
+        expected = getattr(get_settings(), setting_name)
+        if not expected or not api_key or not secrets.compare_digest(api_key, expected):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return check_api_key
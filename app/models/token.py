@@ -6,3 +6,7 @@ class Token(BaseModel):
     
 class TokenData(BaseModel):
     username: str | None = None
+
+class IntrospectRequest(BaseModel):
+    tokens: list[str]
+    include_claims: bool = True
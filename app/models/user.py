@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from pydantic import BaseModel
 from typing import Optional
 from enum import Enum
@@ -7,14 +8,20 @@ class TypeAbonnement(str, Enum):
     PREMIUM = 'premium'
     PRO = 'pro'
 
+SUBSCRIPTION_DATE_FIELDS = ("date_debut", "date_fin", "created_at", "updated_at")
+
+def parse_legacy_date(value: str) -> datetime:
+    """Date d'abonnement stockée en chaîne par l'ancien code ("%Y-%m-%d %H:%M:%S", naïve, heure locale du serveur)"""
+    return datetime.fromisoformat(value).astimezone(timezone.utc)
+
 class Abonnement(BaseModel):
     type_abonnement: TypeAbonnement
-    date_debut: str
-    date_fin: str
+    date_debut: datetime
+    date_fin: datetime
     status: bool
     prix: float
-    created_at: str
-    updated_at: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
     
 class User(BaseModel):
     provider: Optional[str] = None
@@ -24,9 +31,26 @@ class User(BaseModel):
     name: Optional[str] = None
     picture: Optional[str] = None
     abonnement: Optional[Abonnement] = None
+    disabled: Optional[bool] = False
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
 
+    @classmethod
+    def from_trusted(cls, document: dict):
+        """Construit le modèle sans validation à partir d'un document MongoDB (données de confiance)"""
+        abonnement = document.get("abonnement")
+        if abonnement is not None:
+            abonnement = {**abonnement, "type_abonnement": TypeAbonnement(abonnement["type_abonnement"])}
+            # Dates encore en chaînes tant que `--migrate-dates` n'a pas tourné
+            for field in SUBSCRIPTION_DATE_FIELDS:
+                if isinstance(abonnement.get(field), str):
+                    try:
+                        abonnement[field] = parse_legacy_date(abonnement[field])
+                    except ValueError:
+                        pass
+            document = {**document, "abonnement": Abonnement.model_construct(**abonnement)}
+        return cls.model_construct(**document)
+
 class UserInDB(User):
     password: Optional[str] = None
 
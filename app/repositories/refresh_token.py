@@ -0,0 +1,42 @@
+from datetime import datetime
+from pymongo import ASCENDING, ReturnDocument
+from app.core.database import Database
+
+class RefreshTokenRepository():
+    """Refresh tokens : un document compact par token, identifié par l'empreinte du token.
+
+    `{_id: sha256, family_id, sub, expires_at, used}` — le token en clair n'est
+    jamais stocké. Les tokens déjà utilisés sont gardés jusqu'à leur expiration
+    pour détecter leur réutilisation, puis supprimés par l'index TTL.
+    """
+    def __init__(self, database: Database):
+        self.collection = database.get_db()["refresh_tokens"]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"
+        )
+        await self.collection.create_index([("family_id", ASCENDING)], name="family_id")
+
+    async def insert(self, token_hash: str, family_id: str, sub: str, expires_at: datetime):
+        await self.collection.insert_one({
+            "_id": token_hash,
+            "family_id": family_id,
+            "sub": sub,
+            "expires_at": expires_at,
+            "used": False,
+        })
+
+    async def consume(self, token_hash: str) -> dict | None:
+        """Marque le token comme utilisé et le retourne, None s'il est inconnu ou déjà utilisé"""
+        return await self.collection.find_one_and_update(
+            {"_id": token_hash, "used": False},
+            {"$set": {"used": True}},
+            return_document=ReturnDocument.BEFORE,
+        )
+
+    async def find(self, token_hash: str) -> dict | None:
+        return await self.collection.find_one({"_id": token_hash})
+
+    async def delete_family(self, family_id: str):
+        await self.collection.delete_many({"family_id": family_id})
@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import json
+from bson import ObjectId
+from datetime import datetime
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.database import Database
+from app.core.errors import ServiceNotReadyError
+
+# Projections par cas d'usage : seuls les champs utiles quittent MongoDB
+CREDENTIALS_PROJECTION = {"_id": 0, "email": 1, "password": 1, "disabled": 1}
+PROFILE_PROJECTION = {
+    "_id": 0, "provider": 1, "provider_id": 1, "username": 1, "email": 1, "name": 1,
+    "picture": 1, "abonnement": 1, "disabled": 1, "created_at": 1, "updated_at": 1,
+}
+SUBSCRIPTION_PROJECTION = {"email": 1, "abonnement": 1}
+STATUS_PROJECTION = {"_id": 0, "email": 1, "disabled": 1}
+
+class DuplicateUsersError(RuntimeError):
+    """Des comptes en double empêchent la création d'un index unique sur users"""
+    pass
+
+class DuplicateEmailsError(DuplicateUsersError):
+    """Des comptes partagent un email : l'index unique `email_unique` ne peut pas être créé"""
+    def __init__(self, emails: list[str]):
+        self.emails = emails
+        super().__init__(
+            "Impossible de créer l'index unique users.email, emails en double : "
+            f"{', '.join(emails)}. Listez les comptes concernés avec "
+            "`python -m app.repositories.user duplicates`, fusionnez ou supprimez les "
+            "doublons (un seul document par email), puis redémarrez le service."
+        )
+
+class DuplicateProviderIdentitiesError(DuplicateUsersError):
+    """Des comptes partagent (provider, provider_id) : l'index `provider_identity_unique` ne peut pas être créé"""
+    def __init__(self, identities: list[tuple[str, str]]):
+        self.identities = identities
+        super().__init__(
+            "Impossible de créer l'index unique users.(provider, provider_id), identités en double : "
+            f"{', '.join(f'{provider}:{provider_id}' for provider, provider_id in identities)}. "
+            "Listez les comptes concernés avec `python -m app.repositories.user duplicates`, "
+            "fusionnez ou supprimez les doublons (un seul document par identité), puis "
+            "redémarrez le service."
+        )
+
+class UserRepository():
+    """Accès asynchrone à la collection des utilisateurs.
+
+    Les doublons (email, identité provider) ne sont refusés que par les index
+    uniques : les écritures qui créent des comptes attendent `ensure_indexes`.
+    """
+    def __init__(self, database: Database, index_wait_seconds: float = 5):
+        self.users_collection = database.get_users_collection()
+        self.index_wait_seconds = index_wait_seconds
+        self.indexes_ready = asyncio.Event()
+        self.index_error = None
+
+    @staticmethod
+    def _to_object_id(user_id):
+        if isinstance(user_id, str) and ObjectId.is_valid(user_id):
+            return ObjectId(user_id)
+        return user_id
+
+    async def ensure_indexes(self):
+        """Crée les index au démarrage (sans effet s'ils existent déjà).
+
+        Lève DuplicateEmailsError ou DuplicateProviderIdentitiesError si des
+        comptes sont en double : les anciens callbacks OAuth faisaient un
+        find_one puis un insert_one, sans vérifier l'email.
+        """
+        indexes = await self.users_collection.index_information()
+        if "email_unique" not in indexes:
+            duplicates = await self.find_duplicate_emails()
+            if duplicates:
+                self.index_error = DuplicateEmailsError(duplicates)
+                raise self.index_error
+        if "provider_identity_unique" not in indexes:
+            duplicates = await self.find_duplicate_provider_identities()
+            if duplicates:
+                self.index_error = DuplicateProviderIdentitiesError(duplicates)
+                raise self.index_error
+        await self.users_collection.create_index(
+            [("email", ASCENDING)], unique=True, name="email_unique"
+        )
+        # Recherche des abonnements expirés par le balayage périodique
+        await self.users_collection.create_index(
+            [("abonnement.date_fin", ASCENDING)], name="abonnement_date_fin"
+        )
+        # Index partiel : les comptes locaux n'ont pas de provider_id
+        await self.users_collection.create_index(
+            [("provider", ASCENDING), ("provider_id", ASCENDING)],
+            unique=True,
+            name="provider_identity_unique",
+            partialFilterExpression={"provider_id": {"$type": "string"}},
+        )
+        self.index_error = None
+        self.indexes_ready.set()
+
+    async def wait_for_indexes(self):
+        """Retient une création de compte jusqu'aux index uniques, ServiceNotReadyError au-delà du délai"""
+        if self.indexes_ready.is_set():
+            return
+        if self.index_error is None:
+            try:
+                await asyncio.wait_for(self.indexes_ready.wait(), self.index_wait_seconds)
+                return
+            except asyncio.TimeoutError:
+                pass
+        raise ServiceNotReadyError()
+
+    async def find_duplicate_emails(self, limit: int = 20) -> list[str]:
+        cursor = await self.users_collection.aggregate([
+            {"$group": {"_id": "$email", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": limit},
+        ])
+        return [row["_id"] async for row in cursor]
+
+    async def find_duplicate_provider_identities(self, limit: int = 20) -> list[tuple[str, str]]:
+        cursor = await self.users_collection.aggregate([
+            # Même périmètre que l'index partiel
+            {"$match": {"provider_id": {"$type": "string"}}},
+            {"$group": {"_id": {"provider": "$provider", "provider_id": "$provider_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": limit},
+        ])
+        return [(row["_id"]["provider"], row["_id"]["provider_id"]) async for row in cursor]
+
+    async def find_by_email(self, email: str, projection: dict | None = None) -> dict | None:
+        return await self.users_collection.find_one({"email": email}, projection)
+
+    async def find_by_id(self, user_id, projection: dict | None = None) -> dict | None:
+        return await self.users_collection.find_one({"_id": self._to_object_id(user_id)}, projection)
+
+    async def find_credentials(self, email: str) -> dict | None:
+        """Email, hash du mot de passe et statut : tout ce qu'il faut pour /auth/token"""
+        return await self.find_by_email(email, CREDENTIALS_PROJECTION)
+
+    async def find_profile(self, email: str) -> dict | None:
+        """Profil public, sans mot de passe, id_token ni champs internes"""
+        return await self.find_by_email(email, PROFILE_PROJECTION)
+
+    async def find_subscription(self, user_id) -> dict | None:
+        return await self.find_by_id(user_id, SUBSCRIPTION_PROJECTION)
+
+    async def find_status(self, email: str) -> dict | None:
+        """Email et statut seuls (index email_unique)"""
+        return await self.find_by_email(email, STATUS_PROJECTION)
+
+    async def find_statuses(self, emails: list[str]) -> dict[str, dict]:
+        """Email et statut de plusieurs utilisateurs en une seule requête, indexés par email"""
+        cursor = self.users_collection.find({"email": {"$in": emails}}, STATUS_PROJECTION)
+        return {user["email"]: user async for user in cursor}
+
+    async def insert(self, document: dict):
+        """Insère un utilisateur, lève DuplicateKeyError si l'email existe déjà"""
+        await self.wait_for_indexes()
+        result = await self.users_collection.insert_one(document)
+        return result.inserted_id
+
+    async def insert_many(self, documents: list[dict]) -> list:
+        """Insertion non ordonnée, lève BulkWriteError avec le détail des documents refusés"""
+        await self.wait_for_indexes()
+        result = await self.users_collection.insert_many(documents, ordered=False)
+        return result.inserted_ids
+
+    def iter_all(self, projection: dict, batch_size: int):
+        """Curseur asynchrone sur tous les utilisateurs, lu par lots de `batch_size`"""
+        return self.users_collection.find({}, projection, batch_size=batch_size)
+
+    async def upsert_provider_user(self, provider: str, provider_id: str, on_insert: dict, on_update: dict) -> dict:
+        """Crée ou met à jour un utilisateur OAuth en un seul aller-retour.
+
+        Lève DuplicateKeyError si l'email appartient déjà à un autre compte.
+        """
+        await self.wait_for_indexes()
+        query = {"provider": provider, "provider_id": provider_id}
+        update = {"$set": on_update, "$setOnInsert": on_insert}
+        try:
+            return await self.users_collection.find_one_and_update(
+                query, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Deux connexions simultanées ont tenté l'insertion : l'autre a gagné,
+            # on relance pour appliquer la mise à jour sur le document créé
+            return await self.users_collection.find_one_and_update(
+                query, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+
+    @staticmethod
+    def expired_subscription_filter(now: datetime) -> dict:
+        """Abonnements payants actifs dont la date de fin est passée (les abonnements FREE n'expirent pas)"""
+        return {
+            "abonnement.date_fin": {"$lt": now},
+            "abonnement.status": True,
+            "abonnement.type_abonnement": {"$ne": "free"},
+        }
+
+    async def find_expired_subscriptions(self, now: datetime, limit: int) -> list[dict]:
+        cursor = self.users_collection.find(
+            self.expired_subscription_filter(now), {"email": 1}
+        ).sort("abonnement.date_fin", ASCENDING).limit(limit)
+        return await cursor.to_list()
+
+    def iter_string_subscription_dates(self, fields: tuple, batch_size: int):
+        """Utilisateurs dont l'abonnement a encore des dates stockées en chaînes (ancien format)"""
+        query = {"$or": [{f"abonnement.{field}": {"$type": "string"}} for field in fields]}
+        return self.users_collection.find(query, {"abonnement": 1}, batch_size=batch_size)
+
+    async def bulk_write(self, operations: list):
+        return await self.users_collection.bulk_write(operations, ordered=False)
+
+    async def update_password_hash(self, email: str, old_hash: str, new_hash: str) -> bool:
+        """Remplace le hash seulement s'il n'a pas changé entre-temps (pas d'écrasement d'un nouveau mot de passe)"""
+        result = await self.users_collection.update_one(
+            {"email": email, "password": old_hash}, {"$set": {"password": new_hash}}
+        )
+        return result.modified_count == 1
+
+    async def update_by_id(self, user_id, fields: dict):
+        await self.users_collection.update_one(
+            {"_id": self._to_object_id(user_id)},
+            {"$set": fields}
+        )
+
+async def list_duplicates():
+    from app.core.config import get_settings
+
+    database = Database(get_settings())
+    accounts = {"$push": {"_id": {"$toString": "$_id"}, "provider": "$provider", "email": "$email", "created_at": "$created_at"}}
+    checks = [
+        ("email", [{"$group": {"_id": "$email", "count": {"$sum": 1}, "accounts": accounts}}]),
+        ("provider_identity", [
+            {"$match": {"provider_id": {"$type": "string"}}},
+            {"$group": {"_id": {"provider": "$provider", "provider_id": "$provider_id"}, "count": {"$sum": 1}, "accounts": accounts}},
+        ]),
+    ]
+    try:
+        for index, pipeline in checks:
+            cursor = await database.get_users_collection().aggregate(pipeline + [{"$match": {"count": {"$gt": 1}}}])
+            async for row in cursor:
+                print(json.dumps({"index": index, "key": row["_id"], "accounts": row["accounts"]}, default=str))
+    finally:
+        await database.close()
+
+if __name__ == "__main__":
+    # python -m app.repositories.user duplicates
+    # Une ligne par email ou identité provider en double, avec les comptes à fusionner
+    # avant de créer les index uniques
+    parser = argparse.ArgumentParser(description="Contrôle des comptes en double")
+    parser.add_argument("command", choices=["duplicates"])
+    parser.parse_args()
+    asyncio.run(list_duplicates())
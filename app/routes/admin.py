@@ -0,0 +1,42 @@
+from typing import TYPE_CHECKING
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from app.core.security import require_api_key
+
+if TYPE_CHECKING:
+    from app.core.container import Container
+
+class AdminRouter():
+    """Routes d'administration, protégées par l'en-tête X-Admin-Key"""
+    def __init__(self):
+        self.router = APIRouter(prefix="/admin", tags=["admin"])
+        self.container = None
+        # Sans ADMIN_API_KEY configurée, les routes d'administration sont fermées
+        self.require_admin_key = require_api_key("ADMIN_API_KEY", "X-Admin-Key")
+
+    def bind(self, container: "Container"):
+        """Injecte le conteneur créé par le lifespan de l'application"""
+        self.container = container
+        self.bulk_users = container.bulk_users
+
+    def configure_routes(self):
+        @self.router.post("/users/import", dependencies=[Depends(self.require_admin_key)])
+        async def import_users(request: Request):
+            """Corps NDJSON : une ligne UserCreate par utilisateur.
+
+            Le corps est lu en flux ; la réponse (bilan JSON) est envoyée une fois
+            le flux consommé, les erreurs sont indiquées par numéro de ligne.
+            """
+            report = await self.bulk_users.import_users(request.stream())
+            return ORJSONResponse(report)
+
+        @self.router.get("/users/export", dependencies=[Depends(self.require_admin_key)])
+        async def export_users(include_password_hash: bool = False):
+            return StreamingResponse(
+                self.bulk_users.export_users(include_password_hash),
+                media_type="application/x-ndjson",
+            )
+
+    def get_router(self):
+        self.configure_routes()
+        return self.router
@@ -1,31 +1,90 @@
 from fastapi import APIRouter, Response, Cookie
-from app.services.oauth_provider import OAuthProviderService
-from app.services.oauth import OAuthService
 from fastapi import Request
-from app.core.database import Database
+from fastapi.responses import ORJSONResponse
+from app.core.errors import HasherSaturatedError
 import time
-from app.core.config import Settings
+from app.core.config import get_settings
+from app.core.metrics import timed
+from app.core.security import require_api_key
 from app.models.user import UserCreate, Abonnement, TypeAbonnement
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from typing import Annotated, Optional
-from app.models.token import TokenData
-from datetime import timedelta
+from typing import TYPE_CHECKING, Annotated, Optional
+from app.models.token import IntrospectRequest, TokenData
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 from app.models.user import User, UserLogin 
-import jwt
 from jwt.exceptions import InvalidTokenError
 
+if TYPE_CHECKING:
+    from app.core.container import Container
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 class AuthRouter():
     def __init__(self):
-        self.oauthProvider = OAuthProviderService()
-        self.oauth = OAuthService()
         self.router = APIRouter(prefix="/auth", tags=["auth"])
-        self._settings = Settings()
-        self.db = Database(self._settings)
-        self.users_collection = self.db.get_users_collection()
+        self._settings = get_settings()
+        self.container = None
+        # Sans INTERNAL_API_KEY configurée, l'introspection est fermée
+        self.require_internal_key = require_api_key("INTERNAL_API_KEY", "X-Internal-Key")
+
+    def bind(self, container: "Container"):
+        """Injecte le conteneur créé par le lifespan de l'application"""
+        self.container = container
+        self.oauth = container.oauth
+        self.users = container.users
+        self.tokens = container.tokens
+        self.revocations = container.revocations
+        self.login_rate_limiter = container.login_rate_limiter
+        self.refresh_tokens = container.refresh_tokens
+
+    @property
+    def oauthProvider(self):
+        # Construit à la première connexion OAuth en mode de démarrage paresseux
+        return self.container.oauth_provider
+
+    async def _set_auth_cookies(self, response: Response, subject: str, family_id: Optional[str] = None):
+        """Pose le cookie d'accès (court) et le refresh token (limité aux routes /auth)"""
+        access_token = self.oauth.create_access_token(
+            data={"sub": subject}, 
+            expires_delta=timedelta(minutes=self._settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        response.set_cookie(
+            key="access_token",
+            value=access_token,
+            httponly=True,       # Inaccessible depuis JavaScript
+            secure=self._settings.is_production,  # Seulement en HTTPS en production
+            samesite="strict",   # Protection CSRF
+            max_age=self._settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60  # En secondes
+        )
+        refresh_token = await self.refresh_tokens.issue(subject, family_id)
+        response.set_cookie(
+            key="refresh_token",
+            value=refresh_token,
+            httponly=True,
+            secure=self._settings.is_production,
+            samesite="strict",
+            max_age=self._settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
+            path="/auth",
+        )
+
+    async def _clear_auth_cookies(self, response: Response, refresh_token: Optional[str]):
+        """Révoque la famille du refresh token et supprime les cookies"""
+        if refresh_token:
+            await self.refresh_tokens.revoke(refresh_token)
+        response.delete_cookie(key="access_token")
+        response.delete_cookie(key="refresh_token", path="/auth")
+
+    def _token_subject(self, access_token: Optional[str]) -> Optional[str]:
+        """Retourne le `sub` du token s'il est valide, sans lever d'exception"""
+        if not access_token:
+            return None
+        try:
+            payload = self.tokens.decode(access_token)
+        except InvalidTokenError:
+            return None
+        return payload.get("sub")
 
     def get_current_user_dependency(self):
         """Retourne une closure pour la dépendance get_current_user"""
@@ -40,14 +99,14 @@ class AuthRouter():
                 raise credentials_exception
                 
             try:
-                payload = jwt.decode(access_token, self._settings.SECRET_KEY_JWT, algorithms=[self._settings.ALGORITHM])
+                payload = self.tokens.decode(access_token)
                 username: str = payload.get("sub")
                 if username is None:
                     raise credentials_exception
                 token_data = TokenData(username=username)
             except InvalidTokenError:
                 raise credentials_exception
-            user = self.oauth.get_user(token_data.username)
+            user = await self.oauth.get_current_user(token_data.username)
             if user is None:
                 raise credentials_exception
             return user
@@ -61,7 +120,7 @@ class AuthRouter():
                 raise HTTPException(status_code=400, detail="Inactive user")
             return current_user
         return get_current_active_user
-    
+
     def configure_routes(self):
         # Configure les routes dans l'init
 
@@ -70,17 +129,20 @@ class AuthRouter():
             """Redirige l'utilisateur vers le provider pour l'authentification"""
             if not provider:
                 return await self.aouth
-            return await self.oauthProvider.create_client(provider).authorize_redirect(
-                request, 
-                "http://localhost:8080/tournaments"
-            )
+            with timed(f"{provider}_authorize_redirect"):
+                return await self.oauthProvider.create_client(provider).authorize_redirect(
+                    request, 
+                    "http://localhost:8080/tournaments"
+                )
 
         @self.router.get("/callback/github")
         async def callback_github(request: Request):
             """Récupère le token OAuth et enregistre l'utilisateur dans la base de données"""
             try:
-                token = await self.oauthProvider.get_oauth().github.authorize_access_token(request)
-                resp = await self.oauthProvider.get_oauth().github.get('user', token=token)
+                with timed("github_authorize_access_token"):
+                    token = await self.oauthProvider.get_oauth().github.authorize_access_token(request)
+                with timed("github_userinfo"):
+                    resp = await self.oauthProvider.get_oauth().github.get('user', token=token)
                 user_data = resp.json()
             except Exception as e:
                 print(f"Erreur OAuth GitHub: {str(e)}")
@@ -93,30 +155,24 @@ class AuthRouter():
             
             expires_at = int(time.time()) + token.get('expires_in', 3600)
             
-            # Vérifie si l'utilisateur existe déjà dans la base de données
-            existing_user = self.users_collection.find_one({"provider_id": str(user_data['id'])})
-            if not existing_user:
-                # Si l'utilisateur n'existe pas, l'enregistre dans la base de données
-                self.users_collection.insert_one({
-                    "provider": "github",
-                    "provider_id": str(user_data['id']),
+            # Crée l'utilisateur s'il n'existe pas, sinon met à jour les champs nécessaires
+            user = await self.oauth.upsert_provider_user(
+                "github",
+                str(user_data['id']),
+                on_insert={
                     "email": primary_email,
                     "name": user_data.get('name') or user_data['login'],
                     "picture": user_data['avatar_url'],
                     "expires_at": expires_at,
                     "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
-                })
-            else:
-                # Si l'utilisateur existe déjà, met à jour les champs nécessaires
-                self.users_collection.update_one(
-                    {"provider_id": str(user_data['id'])},
-                    {"$set": {
-                        # "access_token": token["access_token"],
-                        "updated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
-                    }}
-                )
-            
-            user_id = existing_user["_id"] if existing_user else None
+                },
+                on_update={
+                    # "access_token": token["access_token"],
+                    "updated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
+                },
+            )
+            user_id = user["_id"]
+            await self.oauth.invalidate_user(primary_email)
             
             # créer une session pour l'utilisateur
             request.session["user_id"] = str(user_id)
@@ -130,147 +186,157 @@ class AuthRouter():
         async def callback_google(request: Request, response: Response):
             """Récupère le token OAuth et enregistre l'utilisateur dans la base de données"""
             try:
-                token = await self.oauthProvider.get_oauth().google.authorize_access_token(request)
-                user_info = await self.oauthProvider.get_oauth().google.get("userinfo", token=token)
+                with timed("google_authorize_access_token"):
+                    token = await self.oauthProvider.get_oauth().google.authorize_access_token(request)
+                with timed("google_userinfo"):
+                    user_info = await self.oauthProvider.get_oauth().google.get("userinfo", token=token)
                 user_data = user_info.json()
                 expires_at = token["expires_at"]
             except Exception as e:
                 print(f"Erreur OAuth Google: {str(e)}")
                 raise HTTPException(status_code=400, detail=f"Erreur d'authentification Google: {str(e)}")
-            # Vérifie si l'utilisateur existe déjà dans la base de données
-            existing_user = self.users_collection.find_one({"provider_id": user_data["id"]})
-            if not existing_user:
-                # Si l'utilisateur n'existe pas, l'enregistre dans la base de données
-                self.users_collection.insert_one({
-                    "provider": "google",
-                    "provider_id": user_data["id"],
+            # Crée l'utilisateur s'il n'existe pas, sinon met à jour les champs nécessaires
+            user = await self.oauth.upsert_provider_user(
+                "google",
+                user_data["id"],
+                on_insert={
                     "email": user_data["email"],
                     "name": user_data["name"],
                     "picture": user_data["picture"],
                     "expires_at": expires_at,
-                    "id_token": token["id_token"],
                     "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
-                })
-            else:
-                # Si l'utilisateur existe déjà, met à jour les champs nécessaires
-                self.users_collection.update_one(
-                    {"provider_id": user_data["id"]},
-                    {"$set": {
-                        # "access_token": token["access_token"],
-                        "id_token": token["id_token"],
-                        "updated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
-                    }}
-                )
-            user_id = existing_user["_id"] if existing_user else None
+                },
+                on_update={
+                    # "access_token": token["access_token"],
+                    "id_token": token["id_token"],
+                    "updated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
+                },
+            )
+            user_id = user["_id"]
+            await self.oauth.invalidate_user(user_data["email"])
             
             # # créer une session pour l'utilisateur
             # request.session["user_id"] = str(user_id)
             # request.session["provider"] = "google"
             # request.session["access_token"] = token["access_token"]
             
-            # Définir le cookie sécurisé
-            token = self.oauth.create_access_token(
-                data={"sub": user_data["email"]}, 
-                expires_delta=timedelta(minutes=self._settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            )
-            response.set_cookie(
-                key="access_token",
-                value=token,
-                httponly=True,       # Inaccessible depuis JavaScript
-                secure=self._settings.is_production,  # Seulement en HTTPS en production
-                samesite="strict",   # Protection CSRF
-                max_age=self._settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60  # En secondes
-            )
+            # Définir les cookies sécurisés
+            await self._set_auth_cookies(response, user_data["email"])
             return {"message": "Utilisateur enregistré avec succès",
                     "user": user_data}
         
         @self.router.get("/logout")
-        async def logout(request: Request, response: Response):
+        async def logout(
+            request: Request,
+            response: Response,
+            access_token: Optional[str] = Cookie(None),
+            refresh_token: Optional[str] = Cookie(None),
+        ):
             """Déconnecte l'utilisateur"""
             user_id = request.session.get("user_id")
+            await self.oauth.invalidate_user(self._token_subject(access_token))
 
             if user_id:
-                user = self.users_collection.find_one({"_id": user_id})
-                if user and user.access_token:
-                    try:
-                        if user.provider == "github":
-                            await self.oauthProvider.get_oauth().github.revoke(user.access_token)
-                        elif user.provider == "google":
-                            await self.oauthProvider.get_oauth().google.revoke(user.access_token)
-                    except Exception as e:
-                        print(f"Erreur lors de la révocation du token: {str(e)}")
-                self.users_collection.update_one(
-                    {"_id": user_id},
-                    {"$set": {
-                        # "access_token": None,
-                    }}
-                )
+                # La révocation chez le provider est faite en arrière-plan
+                provider = request.session.get("provider")
+                provider_token = request.session.get("access_token")
+                if provider and provider_token:
+                    await self.revocations.enqueue(provider, provider_token)
+                user = await self.users.find_by_id(user_id, {"email": 1})
+                if user:
+                    await self.oauth.invalidate_user(user.get("email"))
                 request.session.clear()
             
-            # Supprimer le cookie d'authentification
-            response.delete_cookie(key="access_token")
+            # Supprimer les cookies d'authentification
+            await self._clear_auth_cookies(response, refresh_token)
             return {"message": "Déconnexion réussie"}
 
         @self.router.post("/logout")
-        async def logout_post(response: Response):
+        async def logout_post(
+            response: Response,
+            access_token: Optional[str] = Cookie(None),
+            refresh_token: Optional[str] = Cookie(None),
+        ):
             """Déconnecte l'utilisateur (version POST)"""
-            # Supprimer le cookie d'authentification
-            response.delete_cookie(key="access_token")
+            await self.oauth.invalidate_user(self._token_subject(access_token))
+            # Supprimer les cookies d'authentification
+            await self._clear_auth_cookies(response, refresh_token)
             return {"message": "Déconnexion réussie"}
 
         @self.router.post('/register')
         async def register(user: UserCreate):
             """Enregistre un nouvel utilisateur"""
-            return self.oauth.create_user(user)
+            return await self.oauth.create_user(user)
         
         @self.router.post('/token')
         async def login_for_access_token(
+            request: Request,
             response: Response, 
             user: UserLogin
         ):
             """Génère un token pour l'utilisateur et l'envoie dans un cookie sécurisé"""
+            # Refuse les rafales avant toute requête MongoDB ou calcul bcrypt
+            client_ip = self.login_rate_limiter.client_ip(request.headers, request.client.host if request.client else None)
+            await self.login_rate_limiter.check(client_ip, user.email)
             try:
-                user = self.oauth.authenticate_user(user.email, user.password)
+                user = await self.oauth.authenticate_user(user.email, user.password)
+            except HasherSaturatedError:
+                raise
             except Exception as e:
                 raise HTTPException(status_code=401, detail=f"Invalid username or password: {e}")
+            if not user:
+                raise HTTPException(status_code=401, detail="Invalid username or password")
             
-            access_token_expires = timedelta(minutes=self._settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = self.oauth.create_access_token(
-                data={"sub": user.email}, 
-                expires_delta=access_token_expires
-            )
-            
-            # Définir le cookie sécurisé
-            response.set_cookie(
-                key="access_token",
-                value=access_token,
-                httponly=True,       # Inaccessible depuis JavaScript
-                secure=self._settings.is_production,  # Seulement en HTTPS en production
-                samesite="strict",   # Protection CSRF
-                max_age=self._settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60  # En secondes
-            )
+            # Définir les cookies sécurisés
+            await self._set_auth_cookies(response, user.email)
             
             return {"message": "Connexion réussie", "token_type": "bearer"}
+
+        @self.router.post('/refresh')
+        async def refresh_access_token(response: Response, refresh_token: Optional[str] = Cookie(None)):
+            """Échange le refresh token contre un nouveau couple access/refresh token"""
+            if not refresh_token:
+                raise HTTPException(status_code=401, detail="Refresh token manquant")
+            subject, family_id = await self.refresh_tokens.rotate(refresh_token)
+            await self._set_auth_cookies(response, subject, family_id)
+            return {"message": "Token rafraîchi", "token_type": "bearer"}
         
+        @self.router.post("/introspect", dependencies=[Depends(self.require_internal_key)])
+        async def introspect(body: IntrospectRequest):
+            """Valide un lot de tokens pour la passerelle et les services internes.
+
+            Réponse JSON compacte (orjson), un résultat par token dans l'ordre de la
+            requête. Les clients gardent la connexion ouverte (keep-alive) entre les lots.
+            """
+            if len(body.tokens) > self._settings.INTROSPECT_MAX_TOKENS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"At most {self._settings.INTROSPECT_MAX_TOKENS} tokens per request",
+                )
+            results = await self.oauth.introspect(body.tokens, body.include_claims)
+            return ORJSONResponse({"results": results})
+
         @self.router.get("/users/me")
         async def read_users_me(current_user: Annotated[User, Depends(self.get_current_active_user_dependency())]):
             """Récupère les informations de l'utilisateur connecté"""
-            return current_user
+            return ORJSONResponse(current_user.model_dump())
 
         @self.router.post("/users/me/abonnement")
         async def update_abonnement(user_id: str, abonnement: Abonnement):
             """Met à jour l'abonnement de l'utilisateur"""
-            user = self.users_collection.find_one({"_id": user_id})
+            user = await self.users.find_subscription(user_id)
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
-            user_abonnement = user.abonnement
+            user_abonnement = Abonnement(**user["abonnement"]) if user.get("abonnement") else None
             if not user_abonnement:
+                now = datetime.now(timezone.utc)
                 user_abonnement = Abonnement(
                     type_abonnement=TypeAbonnement.FREE,
-                    date_debut=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
-                    date_fin=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
+                    date_debut=now,
+                    date_fin=now,
                     status=True,
-                    prix=0
+                    prix=0,
+                    created_at=now,
                 )
             else:
                 user_abonnement.type_abonnement = abonnement.type_abonnement
@@ -278,10 +344,8 @@ class AuthRouter():
                 user_abonnement.date_fin = abonnement.date_fin
                 user_abonnement.status = abonnement.status
                 user_abonnement.prix = abonnement.prix
-            self.users_collection.update_one(
-                {"_id": user_id},
-                {"$set": {"abonnement": user_abonnement}}
-            )
+            await self.users.update_by_id(user_id, {"abonnement": user_abonnement.model_dump()})
+            await self.oauth.invalidate_user(user.get("email"))
             return user_abonnement
         
         
@@ -0,0 +1,126 @@
+from typing import AsyncIterator
+import orjson
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from app.core.config import Settings
+from app.core.metrics import timed
+from app.models.user import UserCreate
+from app.repositories.user import PROFILE_PROJECTION, UserRepository
+from app.services.hashing import PasswordHasher
+
+class BulkImportReport():
+    """Bilan d'un import : compteurs complets, erreurs détaillées limitées à `max_errors`"""
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line: int, detail: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "detail": detail})
+
+    def to_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+class BulkUserService():
+    """Import et export d'utilisateurs en NDJSON (un objet JSON par ligne).
+
+    L'import lit le flux ligne par ligne et écrit par lots de BULK_IMPORT_CHUNK_SIZE :
+    la mémoire dépend de la taille d'un lot, pas de celle du fichier.
+    """
+    def __init__(self, settings: Settings, users: UserRepository, hasher: PasswordHasher):
+        self.users = users
+        self.hasher = hasher
+        self.chunk_size = settings.BULK_IMPORT_CHUNK_SIZE
+        self.max_line_bytes = settings.BULK_IMPORT_MAX_LINE_BYTES
+        self.max_reported_errors = settings.BULK_IMPORT_MAX_REPORTED_ERRORS
+        self.export_batch_size = settings.BULK_EXPORT_BATCH_SIZE
+
+    async def _iter_lines(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes | None]]:
+        """Découpe le flux en lignes numérotées, `None` pour une ligne trop longue"""
+        buffer = b""
+        line_number = 0
+        skipping = False
+        async for chunk in chunks:
+            buffer += chunk
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                line, start = buffer[start:end], end + 1
+                line_number += 1
+                if skipping:
+                    # Fin d'une ligne trop longue, déjà signalée
+                    skipping = False
+                elif line.strip():
+                    yield line_number, line if len(line) <= self.max_line_bytes else None
+            buffer = buffer[start:]
+            if len(buffer) > self.max_line_bytes and not skipping:
+                # On n'accumule pas une ligne sans fin : erreur et on ignore la suite
+                yield line_number + 1, None
+                skipping = True
+            if skipping:
+                buffer = b""
+        if buffer.strip() and not skipping:
+            yield line_number + 1, buffer if len(buffer) <= self.max_line_bytes else None
+
+    async def _write_batch(self, batch: list[tuple[int, UserCreate]], report: BulkImportReport):
+        plain = [(index, user.password) for index, (_, user) in enumerate(batch) if not self.hasher.is_hash(user.password)]
+        hashes = await self.hasher.hash_many([password for _, password in plain])
+        documents = [user.model_dump() for _, user in batch]
+        for (index, _), hashed_password in zip(plain, hashes):
+            documents[index]["password"] = hashed_password
+
+        try:
+            inserted_ids = await self.users.insert_many(documents)
+            report.inserted += len(inserted_ids)
+        except BulkWriteError as e:
+            # ordered=False : MongoDB insère tout ce qu'il peut et liste les refus par index
+            report.inserted += e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                line = batch[error["index"]][0]
+                detail = "Email already exists" if error.get("code") == 11000 else error.get("errmsg", "Write error")
+                report.add_error(line, detail)
+
+    async def import_users(self, chunks: AsyncIterator[bytes]) -> dict:
+        """Valide chaque ligne contre UserCreate et insère par lots.
+
+        Les mots de passe déjà hachés (bcrypt) sont conservés tels quels.
+        """
+        # Avant de lire le flux : pas de hachage pour un import refusé faute d'index
+        await self.users.wait_for_indexes()
+        report = BulkImportReport(self.max_reported_errors)
+        batch = []
+        with timed("bulk_import"):
+            async for line_number, line in self._iter_lines(chunks):
+                if line is None:
+                    report.add_error(line_number, f"Line exceeds {self.max_line_bytes} bytes")
+                    continue
+                try:
+                    batch.append((line_number, UserCreate.model_validate_json(line)))
+                except ValidationError as e:
+                    report.add_error(line_number, "; ".join(
+                        f"{'.'.join(str(part) for part in error['loc']) or 'line'}: {error['msg']}"
+                        for error in e.errors()
+                    ))
+                    continue
+                if len(batch) >= self.chunk_size:
+                    await self._write_batch(batch, report)
+                    batch = []
+            if batch:
+                await self._write_batch(batch, report)
+        return report.to_dict()
+
+    async def export_users(self, include_password_hash: bool = False) -> AsyncIterator[bytes]:
+        """Une ligne NDJSON par utilisateur, lue depuis un curseur (mémoire constante)"""
+        projection = {**PROFILE_PROJECTION, "password": 1} if include_password_hash else PROFILE_PROJECTION
+        async for document in self.users.iter_all(projection, self.export_batch_size):
+            yield orjson.dumps(document, default=str) + b"\n"
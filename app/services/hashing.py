@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from app.core.config import Settings
+from app.core.errors import HasherSaturatedError
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+class HashTimings():
+    """Compteurs de temps pour une opération de hachage"""
+    def __init__(self):
+        self.count = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    def record(self, waited: float, ran: float):
+        self.count += 1
+        self.wait_seconds += waited
+        self.run_seconds += ran
+        self.max_run_seconds = max(self.max_run_seconds, ran)
+
+    def get_stats(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_wait_ms": self.wait_seconds / self.count * 1000 if self.count else 0.0,
+            "avg_run_ms": self.run_seconds / self.count * 1000 if self.count else 0.0,
+            "max_run_ms": self.max_run_seconds * 1000,
+        }
+
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
+
+def build_crypt_context(scheme: str, bcrypt_rounds: int, argon2_time_cost: int, argon2_memory_cost: int, argon2_parallelism: int) -> "CryptContext":
+    """CryptContext dont `scheme` est le schéma par défaut.
+
+    Les bornes min/max fixées au coût choisi font que `needs_update` signale
+    tout hash d'un autre coût, à la hausse comme à la baisse. L'autre schéma
+    reste reconnu (déprécié) pour vérifier les anciens hashes.
+    """
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"PASSWORD_HASH_SCHEME inconnu : {scheme}")
+    # Importé ici : passlib n'est chargé qu'à la création du hasher, pas à l'import de l'application
+    from passlib.context import CryptContext
+    if scheme == "argon2":
+        from passlib.hash import argon2
+        if not argon2.has_backend():
+            raise RuntimeError("PASSWORD_HASH_SCHEME=argon2 nécessite le paquet 'argon2-cffi'")
+    return CryptContext(
+        schemes=[scheme] + [other for other in PASSWORD_HASH_SCHEMES if other != scheme],
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__default_rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+class PasswordHasher():
+    """Exécute bcrypt dans un pool de threads borné (bcrypt relâche le GIL).
+
+    Au-delà de HASH_MAX_WORKERS calculs en cours et HASH_QUEUE_DEPTH en attente,
+    les appels sont refusés plutôt que de laisser la latence grimper.
+    """
+    def __init__(self, settings: Settings):
+        self.scheme = settings.PASSWORD_HASH_SCHEME
+        self.pwd_context = build_crypt_context(
+            settings.PASSWORD_HASH_SCHEME,
+            settings.BCRYPT_ROUNDS,
+            settings.ARGON2_TIME_COST,
+            settings.ARGON2_MEMORY_COST_KIB,
+            settings.ARGON2_PARALLELISM,
+        )
+        self.max_workers = settings.HASH_MAX_WORKERS or min(4, os.cpu_count() or 1)
+        self.max_pending = self.max_workers + settings.HASH_QUEUE_DEPTH
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hashing")
+        self.pending = 0
+        self.rejected = 0
+        self.timings = {"verify": HashTimings(), "hash": HashTimings()}
+
+    async def _run(self, operation: str, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherSaturatedError()
+        self.pending += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, waited, ran = await loop.run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+        self.timings[operation].record(waited, ran)
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self.pwd_context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.pwd_context.hash, password)
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """True si le hash n'utilise pas le schéma ou le coût de la politique actuelle"""
+        return self.pwd_context.needs_update(hashed_password)
+
+    def is_hash(self, value: str) -> bool:
+        """True si `value` est déjà un hash reconnu (import de comptes existants)"""
+        return self.pwd_context.identify(value) is not None
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hache un lot par vagues de `max_workers`, en attendant quand le pool est saturé.
+
+        Seules les entrées refusées par le pool sont relancées : un hash déjà
+        calculé n'est jamais refait.
+        """
+        hashes = [None] * len(passwords)
+        remaining = list(range(len(passwords)))
+        while remaining:
+            wave = remaining[:self.max_workers]
+            results = await asyncio.gather(*(self.hash(passwords[i]) for i in wave), return_exceptions=True)
+            rejected = []
+            for i, result in zip(wave, results):
+                if isinstance(result, HasherSaturatedError):
+                    rejected.append(i)
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    hashes[i] = result
+            remaining = rejected + remaining[len(wave):]
+            if rejected:
+                # Les connexions interactives restent prioritaires sur l'import
+                await asyncio.sleep(0.1)
+        return hashes
+
+    def get_stats(self) -> dict:
+        return {
+            "scheme": self.scheme,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            **{operation: timings.get_stats() for operation, timings in self.timings.items()},
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def measure_ms(context: "CryptContext", samples: int) -> float:
+    """Durée médiane d'une vérification (même coût qu'un hachage) en millisecondes"""
+    hashed = context.hash("calibration-password")
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+def calibrate(scheme: str, target_ms: float, samples: int, memory_cost: int, parallelism: int) -> dict:
+    """Coût le plus élevé dont la vérification tient dans `target_ms` sur cette machine.
+
+    bcrypt : BCRYPT_ROUNDS à partir de 10 (minimum recommandé), chaque round double le temps.
+    argon2 : ARGON2_TIME_COST à partir de 1, mémoire et parallélisme fixés.
+    """
+    minimum = 10 if scheme == "bcrypt" else 1
+    chosen = None
+    cost = minimum
+    while True:
+        if scheme == "bcrypt":
+            context = build_crypt_context(scheme, cost, 1, memory_cost, parallelism)
+        else:
+            context = build_crypt_context(scheme, 12, cost, memory_cost, parallelism)
+        measured = measure_ms(context, samples)
+        if measured > target_ms and chosen is not None:
+            break
+        # Le minimum est retenu même s'il dépasse la cible
+        chosen = {"cost": cost, "measured_ms": round(measured, 1)}
+        if measured > target_ms:
+            break
+        cost += 1
+
+    if scheme == "bcrypt":
+        settings = {"PASSWORD_HASH_SCHEME": "bcrypt", "BCRYPT_ROUNDS": chosen["cost"]}
+    else:
+        settings = {
+            "PASSWORD_HASH_SCHEME": "argon2",
+            "ARGON2_TIME_COST": chosen["cost"],
+            "ARGON2_MEMORY_COST_KIB": memory_cost,
+            "ARGON2_PARALLELISM": parallelism,
+        }
+    return {"settings": settings, "target_ms": target_ms, "measured_ms": chosen["measured_ms"]}
+
+if __name__ == "__main__":
+    # python -m app.services.hashing calibrate --target-ms 50
+    # À lancer sur la machine de production : la mesure porte sur un seul cœur, au repos
+    parser = argparse.ArgumentParser(description="Calibration du coût de hachage des mots de passe")
+    parser.add_argument("command", choices=["calibrate"])
+    parser.add_argument("--scheme", choices=PASSWORD_HASH_SCHEMES, default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=50)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--argon2-memory-cost-kib", type=int, default=65536)
+    parser.add_argument("--argon2-parallelism", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(calibrate(
+        args.scheme, args.target_ms, args.samples, args.argon2_memory_cost_kib, args.argon2_parallelism
+    )))
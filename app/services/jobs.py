@@ -0,0 +1,155 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, ReturnDocument
+from app.core.config import Settings
+from typing import TYPE_CHECKING, Callable
+from app.core.database import Database
+
+if TYPE_CHECKING:
+    from app.services.oauth_provider import OAuthProviderService
+
+class RevocationQueue():
+    """File de révocation des tokens OAuth, traitée en arrière-plan.
+
+    Chaque job est d'abord écrit dans la collection `revocation_outbox` puis
+    placé dans une file en mémoire. Un job pris en charge est réservé
+    (`locked_until`) le temps de son traitement : si le worker meurt, un autre
+    le récupère à l'expiration de la réservation. Un job réussi est supprimé,
+    un échec est retenté avec un délai exponentiel jusqu'à
+    REVOCATION_MAX_ATTEMPTS, puis marqué `failed`.
+    """
+    def __init__(self, settings: Settings, database: Database, get_oauth_provider: Callable[[], "OAuthProviderService"]):
+        self.outbox = database.get_db()["revocation_outbox"]
+        # Fabrique : le client OAuth n'est construit qu'au premier job traité
+        self.get_oauth_provider = get_oauth_provider
+        self.concurrency = settings.REVOCATION_WORKERS
+        self.max_attempts = settings.REVOCATION_MAX_ATTEMPTS
+        self.retry_base = settings.REVOCATION_RETRY_BASE_SECONDS
+        self.lease = timedelta(seconds=settings.REVOCATION_LEASE_SECONDS)
+        self.recovery_interval = settings.REVOCATION_RECOVERY_INTERVAL_SECONDS
+        self.queue = asyncio.Queue()
+        self.tasks = []
+        self.in_flight = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+
+    async def enqueue(self, provider: str, token: str):
+        now = datetime.now(timezone.utc)
+        job = {
+            "provider": provider,
+            "token": token,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": now,
+            "locked_until": now + self.lease,
+        }
+        result = await self.outbox.insert_one(job)
+        job["_id"] = result.inserted_id
+        self.queue.put_nowait(job)
+
+    async def _claim_orphans(self) -> int:
+        """Récupère les jobs en attente dont la réservation a expiré (redémarrage, autre worker)"""
+        claimed = 0
+        while True:
+            now = datetime.now(timezone.utc)
+            job = await self.outbox.find_one_and_update(
+                {"status": "pending", "locked_until": {"$lte": now}},
+                {"$set": {"locked_until": now + self.lease}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if job is None:
+                return claimed
+            self.queue.put_nowait(job)
+            claimed += 1
+
+    async def _process(self, job: dict):
+        started = time.perf_counter()
+        try:
+            await self.get_oauth_provider().revoke_token(job["provider"], job["token"])
+        except Exception as e:
+            attempts = job["attempts"] + 1
+            if attempts >= self.max_attempts:
+                self.failed += 1
+                print(f"Révocation abandonnée après {attempts} tentatives: {str(e)}")
+                await self.outbox.update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {"status": "failed", "attempts": attempts, "last_error": str(e)}, "$unset": {"token": ""}},
+                )
+                return
+            self.retried += 1
+            delay = self.retry_base * 2 ** (attempts - 1)
+            job["attempts"] = attempts
+            await self.outbox.update_one(
+                {"_id": job["_id"]},
+                {"$set": {
+                    "attempts": attempts,
+                    "last_error": str(e),
+                    "locked_until": datetime.now(timezone.utc) + timedelta(seconds=delay) + self.lease,
+                }},
+            )
+            asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, job)
+            return
+        await self.outbox.delete_one({"_id": job["_id"]})
+        elapsed = time.perf_counter() - started
+        self.succeeded += 1
+        self.latency_seconds += elapsed
+        self.max_latency_seconds = max(self.max_latency_seconds, elapsed)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            self.in_flight += 1
+            try:
+                await self._process(job)
+            except Exception as e:
+                # Erreur MongoDB : le job sera récupéré à l'expiration de sa réservation
+                print(f"Erreur du worker de révocation: {str(e)}")
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    async def _recovery_loop(self):
+        failures = 0
+        while True:
+            try:
+                await self._claim_orphans()
+                failures = 0
+                delay = self.recovery_interval
+            except Exception as e:
+                # MongoDB indisponible (démarrage, bascule) : nouvel essai rapide, puis de plus en plus espacé
+                delay = min(self.recovery_interval, self.retry_base * 2 ** failures)
+                failures += 1
+                print(f"Erreur de récupération des révocations, nouvel essai dans {delay:.1f} s: {str(e)}")
+            await asyncio.sleep(delay)
+
+    async def ensure_indexes(self):
+        await self.outbox.create_index(
+            [("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"
+        )
+
+    async def start(self):
+        """Lance les workers et la boucle de récupération, sans accès à MongoDB"""
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self.tasks.append(asyncio.create_task(self._recovery_loop()))
+
+    async def stop(self):
+        # Les jobs non traités restent dans l'outbox et seront repris au prochain démarrage
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def get_stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "in_flight": self.in_flight,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_latency_ms": self.latency_seconds / self.succeeded * 1000 if self.succeeded else 0.0,
+            "max_latency_ms": self.max_latency_seconds * 1000,
+        }
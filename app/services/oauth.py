@@ -1,58 +1,125 @@
+import asyncio
 from app.core.config import Settings
-from passlib.context import CryptContext
-from app.core.database import Database
-from app.models.user import UserInDB
-from datetime import datetime, timedelta, timezone
-import jwt
+from app.core.cache import UserCache
+from app.core.metrics import timed
+from app.repositories.user import UserRepository
+from app.core.errors import HasherSaturatedError
+from app.services.hashing import PasswordHasher
+from app.services.token import TokenService
+from app.models.user import User, UserInDB
+from datetime import timedelta
 from fastapi import HTTPException
+from jwt.exceptions import InvalidTokenError
+from pymongo.errors import DuplicateKeyError
 from app.models.user import UserCreate
 
 class OAuthService():
-    def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        self.settings = Settings()
-        self.db = Database(self.settings)
-        self.users_collection = self.db.get_users_collection()
+    def __init__(self, settings: Settings, users: UserRepository, hasher: PasswordHasher, user_cache: UserCache, tokens: TokenService):
+        self.hasher = hasher
+        self.tokens = tokens
+        self.user_cache = user_cache
+        self.settings = settings
+        self.users = users
+        self.rehash_tasks = set()
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        with timed("password_verify"):
+            return await self.hasher.verify(plain_password, hashed_password)
     
-    def get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        with timed("password_hash"):
+            return await self.hasher.hash(password)
     
-    def get_user(self, email: str) -> UserInDB | None:
-        user = self.users_collection.find_one({"email": email})
-        if user:
-            return UserInDB(**user)
-        return None
+    async def get_current_user(self, email: str) -> User | None:
+        """Profil projeté (sans mot de passe) via le cache, lu à chaque requête authentifiée"""
+        profile = await self.user_cache.get(email)
+        if profile is None:
+            profile = await self.users.find_profile(email)
+            if profile is None:
+                return None
+            await self.user_cache.set(email, profile)
+        return User.from_trusted(profile)
+
+    async def invalidate_user(self, email: str | None):
+        await self.user_cache.invalidate(email)
     
-    def authenticate_user(self, email: str, password: str) -> UserInDB:
-        user = self.get_user(email)
-        if not user:
+    async def authenticate_user(self, email: str, password: str) -> UserInDB:
+        credentials = await self.users.find_credentials(email)
+        if not credentials:
             return False
-        if not self.verify_password(password, user.password):
+        user = UserInDB.from_trusted(credentials)
+        if not user.password or not await self.verify_password(password, user.password):
             return False
+        if self.settings.PASSWORD_REHASH_ON_LOGIN and self.hasher.needs_update(user.password):
+            # Le mot de passe en clair n'est disponible qu'ici : on migre le hash
+            # vers la politique actuelle sans retarder la réponse
+            task = asyncio.create_task(self._rehash_password(user.email, password, user.password))
+            self.rehash_tasks.add(task)
+            task.add_done_callback(self.rehash_tasks.discard)
         return user
+
+    async def _rehash_password(self, email: str, password: str, old_hash: str):
+        try:
+            with timed("password_rehash"):
+                new_hash = await self.hasher.hash(password)
+                await self.users.update_password_hash(email, old_hash, new_hash)
+        except HasherSaturatedError:
+            # Pool occupé : la prochaine connexion réessaiera
+            pass
+        except Exception as e:
+            print(f"Erreur de mise à jour du hash de {email}: {str(e)}")
     
+    async def introspect(self, tokens: list[str], include_claims: bool = True) -> list[dict]:
+        """Statut de chaque token, dans l'ordre : les utilisateurs sont lus en une seule requête `$in`"""
+        claims_by_token = []
+        for token in tokens:
+            try:
+                claims = self.tokens.decode(token)
+            except InvalidTokenError:
+                claims = None
+            claims_by_token.append(claims if claims and claims.get("sub") else None)
+
+        emails = list({claims["sub"] for claims in claims_by_token if claims})
+        with timed("introspect_users"):
+            statuses = await self.users.find_statuses(emails) if emails else {}
+
+        results = []
+        for claims in claims_by_token:
+            user = statuses.get(claims["sub"]) if claims else None
+            if user is None:
+                # Même réponse pour un token invalide ou un utilisateur supprimé (RFC 7662)
+                results.append({"active": False})
+                continue
+            disabled = bool(user.get("disabled"))
+            result = {"active": not disabled, "disabled": disabled, "sub": claims["sub"]}
+            if include_claims:
+                result["claims"] = claims
+            results.append(result)
+        return results
+
     def create_access_token(self, data: dict, expires_delta: timedelta = None):
-        to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.now(timezone.utc) + expires_delta
-        else:
-            expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.settings.SECRET_KEY_JWT, algorithm=self.settings.ALGORITHM)
-        return encoded_jwt
+        return self.tokens.create_access_token(data, expires_delta)
     
-    def create_user(self, user: UserCreate):
-        if self.users_collection.find_one({"email": user.email}):
-            raise HTTPException(status_code=400, detail="Email already exists")
-        hashed_password = self.get_password_hash(user.password)
+    async def upsert_provider_user(self, provider: str, provider_id: str, on_insert: dict, on_update: dict) -> dict:
+        """Crée ou met à jour un utilisateur OAuth, 409 si l'email appartient à un autre compte"""
+        try:
+            return await self.users.upsert_provider_user(provider, provider_id, on_insert, on_update)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="Email already exists")
+
+    async def create_user(self, user: UserCreate):
+        # Un seul aller-retour : l'index unique sur l'email détecte les doublons,
+        # attendu avant le hachage pour ne pas calculer bcrypt pour une 503
+        await self.users.wait_for_indexes()
+        hashed_password = await self.get_password_hash(user.password)
         userDump = user.model_dump()
         userDump["password"] = hashed_password
-        result = self.users_collection.insert_one(userDump)
-        created_user = self.users_collection.find_one({"_id": result.inserted_id})
+        try:
+            inserted_id = await self.users.insert(userDump)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Email already exists")
+        await self.invalidate_user(user.email)
 
-        if created_user and "_id" in created_user:
-            created_user["_id"] = str(created_user["_id"])
-        return created_user
\ No newline at end of file
+        created_user = {key: value for key, value in userDump.items() if key != "password"}
+        created_user["_id"] = str(inserted_id)
+        return created_user
@@ -1,10 +1,40 @@
 from authlib.integrations.starlette_client import OAuth
+from authlib.integrations.starlette_client.apps import StarletteOAuth2App
 from app.core.config import Settings
+from app.core.metrics import timed
+from app.services.provider_metadata import ProviderMetadataCache
+
+class CachedMetadataOAuth2App(StarletteOAuth2App):
+    """Client OAuth2 qui lit ses métadonnées et son JWKS dans le cache partagé"""
+    metadata_cache: ProviderMetadataCache | None = None
+
+    def _uses_cache(self) -> bool:
+        return self.metadata_cache is not None and self.name in self.metadata_cache.sources
+
+    async def load_server_metadata(self):
+        if not self._uses_cache():
+            return await super().load_server_metadata()
+        self.server_metadata.update(await self.metadata_cache.get_metadata(self.name))
+        return self.server_metadata
+
+    async def fetch_jwk_set(self, force=False):
+        # Authlib force le rechargement quand le kid de l'id_token est inconnu
+        if not self._uses_cache():
+            return await super().fetch_jwk_set(force=force)
+        jwk_set = await self.metadata_cache.get_jwks(self.name, force=force)
+        if not jwk_set:
+            raise RuntimeError('Missing "jwks_uri" in metadata')
+        self.server_metadata["jwks"] = jwk_set
+        return jwk_set
+
+class CachedMetadataOAuth(OAuth):
+    oauth2_client_cls = CachedMetadataOAuth2App
 
 class OAuthProviderService():
-    def __init__(self):
-        self._settings = Settings()
-        self.oauth = OAuth()
+    def __init__(self, settings: Settings, metadata_cache: ProviderMetadataCache):
+        self._settings = settings
+        self.metadata_cache = metadata_cache
+        self.oauth = CachedMetadataOAuth()
         self.oauth.register(
             name="google",
             client_id=self._settings.GOOGLE_CLIENT_ID,
@@ -14,7 +44,7 @@ class OAuthProviderService():
             access_token_url="https://oauth2.googleapis.com/token",
             client_kwargs={"scope": "openid email profile"},
             api_base_url="https://www.googleapis.com/oauth2/v2/",
-            server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+            server_metadata_url=self._settings.GOOGLE_DISCOVERY_URL,
         )
         self.oauth.register(
             name="github",
@@ -30,8 +60,45 @@ class OAuthProviderService():
                 "scope": "user:email read:user"
             }
         )
+        # GitHub n'a pas de discovery OIDC : métadonnées statiques dans le même cache
+        self.metadata_cache.register("google", discovery_url=self._settings.GOOGLE_DISCOVERY_URL)
+        self.metadata_cache.register("github", metadata={
+            "authorization_endpoint": "https://github.com/login/oauth/authorize",
+            "token_endpoint": "https://github.com/login/oauth/access_token",
+            "userinfo_endpoint": "https://api.github.com/user",
+        })
+        for name in ("google", "github"):
+            self.oauth.create_client(name).metadata_cache = self.metadata_cache
+
+    async def revoke_token(self, provider: str, token: str):
+        """Révoque un access token auprès du provider, lève une exception en cas d'échec"""
+        with timed(f"{provider}_revoke"):
+            await self._revoke_token(provider, token)
+
+    async def _revoke_token(self, provider: str, token: str):
+        http = self.metadata_cache.get_http()
+        if provider == "google":
+            metadata = await self.metadata_cache.get_metadata("google")
+            resp = await http.post(
+                metadata.get("revocation_endpoint", "https://oauth2.googleapis.com/revoke"),
+                data={"token": token},
+            )
+        elif provider == "github":
+            resp = await http.request(
+                "DELETE",
+                f"https://api.github.com/applications/{self._settings.GITHUB_CLIENT_ID}/token",
+                auth=(self._settings.GITHUB_CLIENT_ID, self._settings.GITHUB_CLIENT_SECRET),
+                json={"access_token": token},
+                headers={"Accept": "application/vnd.github+json"},
+            )
+        else:
+            raise ValueError(f"Provider inconnu : {provider}")
+        # Un token déjà invalide n'a plus besoin d'être révoqué
+        if resp.status_code not in (200, 204, 400, 404):
+            resp.raise_for_status()
+
     def get_oauth(self):
         return self.oauth
     
     def create_client(self, provider: str):
-        return self.oauth.create_client(provider)
\ No newline at end of file
+        return self.oauth.create_client(provider)
@@ -0,0 +1,128 @@
+import asyncio
+import time
+import httpx
+from app.core.config import Settings
+
+class ProviderMetadataCache():
+    """Cache des métadonnées des providers OAuth (discovery OIDC + JWKS).
+
+    Partagé par les clients Google et GitHub : préchargé au démarrage, rafraîchi
+    en arrière-plan toutes les TTL/2 et servi tel quel (même périmé) si le
+    provider ne répond pas. Un rafraîchissement forcé du JWKS (kid inconnu lors
+    de la vérification d'un id_token) est limité à un par
+    OAUTH_JWKS_MIN_REFRESH_SECONDS pour ne pas marteler le provider.
+    """
+    def __init__(self, settings: Settings):
+        self.ttl = settings.OAUTH_METADATA_TTL_SECONDS
+        self.min_forced_refresh = settings.OAUTH_JWKS_MIN_REFRESH_SECONDS
+        self.timeout = settings.OAUTH_HTTP_TIMEOUT_SECONDS
+        self.sources = {}
+        self.entries = {}
+        self.locks = {}
+        self.http = None
+        self.refresh_task = None
+        self.fetches = 0
+        self.forced_refreshes = 0
+
+    def register(self, name: str, discovery_url: str | None = None, metadata: dict | None = None):
+        """Déclare un provider : document de discovery distant et/ou métadonnées statiques"""
+        self.sources[name] = (discovery_url, metadata or {})
+        self.locks[name] = asyncio.Lock()
+
+    def get_http(self) -> httpx.AsyncClient:
+        """Client HTTP partagé pour les appels aux providers"""
+        if self.http is None:
+            self.http = httpx.AsyncClient(timeout=self.timeout)
+        return self.http
+
+    async def _fetch(self, name: str) -> dict:
+        discovery_url, static_metadata = self.sources[name]
+        metadata = dict(static_metadata)
+        if discovery_url:
+            resp = await self.get_http().get(discovery_url)
+            resp.raise_for_status()
+            metadata.update(resp.json())
+        jwks = None
+        if metadata.get("jwks_uri"):
+            resp = await self.get_http().get(metadata["jwks_uri"])
+            resp.raise_for_status()
+            jwks = resp.json()
+        self.fetches += 1
+        return {"metadata": metadata, "jwks": jwks, "loaded_at": time.monotonic()}
+
+    async def refresh(self, name: str, max_age: float = 0) -> dict:
+        """Recharge le provider sauf si l'entrée a moins de `max_age` secondes"""
+        async with self.locks[name]:
+            # Une autre coroutine a pu recharger pendant qu'on attendait le verrou
+            entry = self.entries.get(name)
+            if entry and time.monotonic() - entry["loaded_at"] < max_age:
+                return entry
+            entry = await self._fetch(name)
+            self.entries[name] = entry
+            return entry
+
+    async def _get_entry(self, name: str) -> dict:
+        entry = self.entries.get(name)
+        if entry is None:
+            return await self.refresh(name, max_age=self.ttl)
+        if time.monotonic() - entry["loaded_at"] >= self.ttl:
+            try:
+                return await self.refresh(name, max_age=self.ttl)
+            except httpx.HTTPError as e:
+                print(f"Métadonnées {name} périmées, rafraîchissement impossible: {str(e)}")
+        return entry
+
+    async def get_metadata(self, name: str) -> dict:
+        entry = await self._get_entry(name)
+        return entry["metadata"]
+
+    async def get_jwks(self, name: str, force: bool = False) -> dict | None:
+        if force:
+            self.forced_refreshes += 1
+            entry = await self.refresh(name, max_age=self.min_forced_refresh)
+        else:
+            entry = await self._get_entry(name)
+        return entry["jwks"]
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl / 2)
+            for name in self.sources:
+                try:
+                    await self.refresh(name, max_age=self.ttl / 2)
+                except httpx.HTTPError as e:
+                    print(f"Erreur de rafraîchissement des métadonnées {name}: {str(e)}")
+
+    async def start(self, preload: bool = True):
+        if preload:
+            results = await asyncio.gather(
+                *(self.refresh(name) for name in self.sources), return_exceptions=True
+            )
+            for name, result in zip(self.sources, results):
+                if isinstance(result, Exception):
+                    # Non bloquant : le chargement sera retenté à la première connexion
+                    print(f"Préchargement des métadonnées {name} impossible: {str(result)}")
+        self.start_refresh_loop()
+
+    def start_refresh_loop(self):
+        """Lance le rafraîchissement périodique (une seule boucle par cache)"""
+        if self.refresh_task is None:
+            self.refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self.refresh_task:
+            self.refresh_task.cancel()
+            try:
+                await self.refresh_task
+            except asyncio.CancelledError:
+                pass
+        if self.http is not None:
+            await self.http.aclose()
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "fetches": self.fetches,
+            "forced_refreshes": self.forced_refreshes,
+            "age_seconds": {name: round(now - entry["loaded_at"], 1) for name, entry in self.entries.items()},
+        }
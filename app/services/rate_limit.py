@@ -0,0 +1,186 @@
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pymongo import ASCENDING, ReturnDocument
+from app.core.config import Settings
+from app.core.database import Database
+from app.core.errors import RateLimitExceeded
+
+def _now() -> float:
+    # Horloge des compteurs, remplaçable dans les tests sans toucher à time.time
+    return time.time()
+
+def sliding_window_retry_after(previous: int, current: int, elapsed: float, window: float, limit: int) -> float:
+    """Temps avant que l'estimation `previous * (1 - elapsed/window) + current` repasse sous `limit`"""
+    if current >= limit:
+        # Il faut attendre la fenêtre suivante, où `current` devient la fenêtre précédente
+        return (window - elapsed) + window * (1 - limit / current)
+    return max(0.0, window * (1 - (limit - current) / previous) - elapsed)
+
+class RateLimitBackend():
+    """Compteur à fenêtre glissante : retourne (autorisé, retry_after)"""
+    async def hit(self, key: str, limit: int, window: int) -> tuple[bool, float]:
+        raise NotImplementedError
+
+    async def undo(self, key: str, window: int):
+        """Annule un `hit` autorisé de la fenêtre courante (sans effet si elle a glissé entre-temps)"""
+        raise NotImplementedError
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Fenêtre glissante approchée (fenêtre courante + précédente pondérée).
+
+    O(1) par requête, trois nombres par clé, au plus `max_keys` clés (LRU).
+    Les requêtes refusées ne sont pas comptées.
+    """
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.entries = OrderedDict()  # clé -> [index de fenêtre, précédente, courante]
+
+    async def hit(self, key: str, limit: int, window: int) -> tuple[bool, float]:
+        now = _now()
+        index = int(now // window)
+        elapsed = now - index * window
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = [index, 0, 0]
+            self.entries[key] = entry
+        elif entry[0] != index:
+            # Glissement : la fenêtre courante devient la précédente (ou vide si trop ancienne)
+            entry[1] = entry[2] if entry[0] == index - 1 else 0
+            entry[2] = 0
+            entry[0] = index
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_keys:
+            self.entries.popitem(last=False)
+
+        _, previous, current = entry
+        if previous * (1 - elapsed / window) + current >= limit:
+            return False, sliding_window_retry_after(previous, current, elapsed, window, limit)
+        entry[2] += 1
+        return True, 0.0
+
+    async def undo(self, key: str, window: int):
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == int(_now() // window) and entry[2] > 0:
+            entry[2] -= 1
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """Même algorithme, compteurs partagés entre workers dans la collection `rate_limits`.
+
+    Un document par clé (index de fenêtre, précédente, courante), supprimé par
+    un index TTL. Glissement, décision et incrément se font dans une seule
+    mise à jour par pipeline : un aller-retour par clé, et comme en mémoire
+    les requêtes refusées ne sont pas comptées.
+    """
+    def __init__(self, database: Database):
+        self.collection = database.get_db()["rate_limits"]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"
+        )
+
+    @staticmethod
+    def _hit_pipeline(index: int, weight: float, limit: int, expires_at: datetime) -> list[dict]:
+        stored_index = {"$ifNull": ["$index", None]}
+        return [
+            # Glissement : la fenêtre courante devient la précédente (ou vide si trop ancienne)
+            {"$set": {
+                "previous": {"$cond": [
+                    {"$eq": [stored_index, index]}, {"$ifNull": ["$previous", 0]},
+                    {"$cond": [{"$eq": [stored_index, index - 1]}, {"$ifNull": ["$current", 0]}, 0]},
+                ]},
+                "current": {"$cond": [{"$eq": [stored_index, index]}, {"$ifNull": ["$current", 0]}, 0]},
+                "index": index,
+            }},
+            {"$set": {"allowed": {"$lt": [{"$add": [{"$multiply": ["$previous", weight]}, "$current"]}, limit]}}},
+            {"$set": {
+                "current": {"$cond": ["$allowed", {"$add": ["$current", 1]}, "$current"]},
+                "expires_at": expires_at,
+            }},
+        ]
+
+    async def hit(self, key: str, limit: int, window: int) -> tuple[bool, float]:
+        now = _now()
+        index = int(now // window)
+        elapsed = now - index * window
+        expires_at = datetime.fromtimestamp((index + 2) * window, tz=timezone.utc)
+        counter = await self.collection.find_one_and_update(
+            {"_id": key},
+            self._hit_pipeline(index, 1 - elapsed / window, limit, expires_at),
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if not counter["allowed"]:
+            return False, sliding_window_retry_after(counter["previous"], counter["current"], elapsed, window, limit)
+        return True, 0.0
+
+    async def undo(self, key: str, window: int):
+        await self.collection.update_one(
+            {"_id": key, "index": int(_now() // window), "current": {"$gt": 0}},
+            {"$inc": {"current": -1}},
+        )
+
+class LoginRateLimiter():
+    """Limite les tentatives de connexion par IP et par email avant tout accès MongoDB/bcrypt"""
+    def __init__(self, settings: Settings, database: Database):
+        self.enabled = settings.LOGIN_RATE_LIMIT_ENABLED
+        self.window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+        self.per_ip = settings.LOGIN_RATE_LIMIT_PER_IP
+        self.per_email = settings.LOGIN_RATE_LIMIT_PER_EMAIL
+        self.ip_header = settings.CLIENT_IP_HEADER
+        self.trusted_proxies = settings.CLIENT_IP_TRUSTED_PROXIES
+        if settings.LOGIN_RATE_LIMIT_BACKEND == "mongo":
+            self.backend = MongoRateLimitBackend(database)
+        else:
+            self.backend = MemoryRateLimitBackend(settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+        self.allowed = 0
+        self.rejected = 0
+
+    async def ensure_indexes(self):
+        if isinstance(self.backend, MongoRateLimitBackend):
+            await self.backend.ensure_indexes()
+
+    def client_ip(self, headers, peer: str | None) -> str | None:
+        """IP du client : entrée ajoutée par le proxy de confiance le plus éloigné, sinon le pair TCP.
+
+        Les entrées plus à gauche de X-Forwarded-For viennent du client et ne
+        sont pas utilisées.
+        """
+        if not self.ip_header:
+            return peer
+        entries = [entry.strip() for entry in headers.get(self.ip_header, "").split(",") if entry.strip()]
+        if len(entries) < self.trusted_proxies:
+            return peer
+        return entries[-self.trusted_proxies]
+
+    async def check(self, ip: str | None, email: str):
+        """Lève RateLimitExceeded si l'IP ou l'email a dépassé sa limite.
+
+        Une tentative refusée n'est comptée sur aucune clé : si l'email est
+        refusé, la tentative déjà comptée sur l'IP est annulée.
+        """
+        if not self.enabled:
+            return
+        counted = []
+        for key, limit in ((f"ip:{ip}", self.per_ip), (f"email:{email.lower()}", self.per_email)):
+            allowed, retry_after = await self.backend.hit(key, limit, self.window)
+            if not allowed:
+                for counted_key in counted:
+                    await self.backend.undo(counted_key, self.window)
+                self.rejected += 1
+                raise RateLimitExceeded(max(1, math.ceil(retry_after)))
+            counted.append(key)
+        self.allowed += 1
+
+    def get_stats(self) -> dict:
+        stats = {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+        if isinstance(self.backend, MemoryRateLimitBackend):
+            stats["keys"] = len(self.backend.entries)
+        return stats
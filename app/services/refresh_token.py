@@ -0,0 +1,61 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from app.core.config import Settings
+from app.repositories.refresh_token import RefreshTokenRepository
+from app.repositories.user import UserRepository
+
+class RefreshTokenService():
+    """Refresh tokens opaques à rotation.
+
+    Chaque rafraîchissement consomme le token présenté et en émet un nouveau
+    dans la même famille. Présenter un token déjà consommé signifie qu'il a
+    fuité : toute la famille est révoquée. La famille est aussi révoquée
+    quand le compte a été supprimé ou désactivé depuis l'émission.
+    """
+    def __init__(self, settings: Settings, refresh_tokens: RefreshTokenRepository, users: UserRepository):
+        self.refresh_tokens = refresh_tokens
+        self.users = users
+        self.expires_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    async def issue(self, sub: str, family_id: str | None = None) -> str:
+        token = secrets.token_urlsafe(32)
+        await self.refresh_tokens.insert(
+            self._hash(token),
+            family_id or uuid.uuid4().hex,
+            sub,
+            datetime.now(timezone.utc) + self.expires_delta,
+        )
+        return token
+
+    async def rotate(self, token: str) -> tuple[str, str]:
+        """Consomme le token et retourne (sub, family_id), lève 401 s'il est invalide"""
+        token_hash = self._hash(token)
+        document = await self.refresh_tokens.consume(token_hash)
+        if document is None:
+            reused = await self.refresh_tokens.find(token_hash)
+            if reused is not None:
+                await self.refresh_tokens.delete_family(reused["family_id"])
+            raise HTTPException(status_code=401, detail="Refresh token invalide")
+        expires_at = document["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        # L'index TTL ne supprime les documents que toutes les 60 secondes environ
+        if expires_at <= datetime.now(timezone.utc):
+            raise HTTPException(status_code=401, detail="Refresh token expiré")
+        user = await self.users.find_status(document["sub"])
+        if user is None or user.get("disabled"):
+            await self.refresh_tokens.delete_family(document["family_id"])
+            raise HTTPException(status_code=401, detail="Utilisateur inconnu ou désactivé")
+        return document["sub"], document["family_id"]
+
+    async def revoke(self, token: str):
+        document = await self.refresh_tokens.find(self._hash(token))
+        if document is not None:
+            await self.refresh_tokens.delete_family(document["family_id"])
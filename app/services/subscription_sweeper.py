@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.core.cache import UserCache
+from app.core.config import Settings
+from app.core.database import Database
+from app.models.user import SUBSCRIPTION_DATE_FIELDS, TypeAbonnement, parse_legacy_date
+from app.repositories.user import UserRepository
+
+class Lease():
+    """Verrou à durée limitée dans la collection `locks`, un document par nom.
+
+    Un seul détenteur à la fois ; si le détenteur meurt, le verrou est repris
+    à l'expiration de `expires_at`.
+    """
+    def __init__(self, database: Database, name: str, duration: timedelta):
+        self.locks = database.get_db()["locks"]
+        self.name = name
+        self.duration = duration
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self) -> bool:
+        """Prend ou prolonge le verrou, False s'il est détenu par un autre"""
+        now = datetime.now(timezone.utc)
+        try:
+            await self.locks.find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + self.duration}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Le document existe avec un autre détenteur encore valide
+            return False
+        return True
+
+    async def release(self):
+        await self.locks.delete_one({"_id": self.name, "owner": self.owner})
+
+class SubscriptionSweeper():
+    """Balayage périodique des abonnements expirés.
+
+    Les abonnements payants actifs dont `date_fin` est passée sont désactivés
+    (ou repassés en FREE selon SUBSCRIPTION_EXPIRY_ACTION) par lots de
+    SUBSCRIPTION_SWEEP_CHUNK_SIZE. Chaque mise à jour reprend le filtre
+    d'expiration : relancer un balayage, ou en lancer deux en même temps, ne
+    modifie pas deux fois le même abonnement. Le verrou `subscription_sweeper`
+    évite que tous les workers balayent en parallèle.
+    """
+    def __init__(self, settings: Settings, database: Database, users: UserRepository, user_cache: UserCache):
+        if settings.SUBSCRIPTION_EXPIRY_ACTION not in ("deactivate", "downgrade"):
+            raise ValueError(f"SUBSCRIPTION_EXPIRY_ACTION inconnue : {settings.SUBSCRIPTION_EXPIRY_ACTION}")
+        self.users = users
+        self.user_cache = user_cache
+        self.enabled = settings.SUBSCRIPTION_SWEEP_ENABLED
+        self.interval = settings.SUBSCRIPTION_SWEEP_INTERVAL_SECONDS
+        self.chunk_size = settings.SUBSCRIPTION_SWEEP_CHUNK_SIZE
+        self.action = settings.SUBSCRIPTION_EXPIRY_ACTION
+        self.lease = Lease(database, "subscription_sweeper", timedelta(seconds=settings.SUBSCRIPTION_SWEEP_LEASE_SECONDS))
+        self.task = None
+        self.runs = 0
+        self.skipped = 0
+        self.expired = 0
+        self.last_duration_seconds = 0.0
+
+    def _expiry_update(self, now: datetime) -> dict:
+        if self.action == "downgrade":
+            return {"$set": {
+                "abonnement.type_abonnement": TypeAbonnement.FREE.value,
+                "abonnement.prix": 0,
+                "abonnement.updated_at": now,
+            }}
+        return {"$set": {"abonnement.status": False, "abonnement.updated_at": now}}
+
+    async def sweep(self) -> dict | None:
+        """Un passage complet, None si un autre worker détient le verrou"""
+        if not await self.lease.acquire():
+            self.skipped += 1
+            return None
+        started = time.perf_counter()
+        # Date figée pour tout le passage : les lots ne courent pas après les expirations en cours
+        now = datetime.now(timezone.utc)
+        update = self._expiry_update(now)
+        report = {"action": self.action, "matched": 0, "modified": 0, "chunks": 0}
+        try:
+            while True:
+                expired = await self.users.find_expired_subscriptions(now, self.chunk_size)
+                if not expired:
+                    break
+                result = await self.users.bulk_write([
+                    UpdateOne({"_id": user["_id"], **self.users.expired_subscription_filter(now)}, update)
+                    for user in expired
+                ])
+                report["chunks"] += 1
+                report["matched"] += len(expired)
+                report["modified"] += result.modified_count
+                for user in expired:
+                    await self.user_cache.invalidate(user.get("email"))
+                if len(expired) < self.chunk_size or not await self.lease.acquire():
+                    break
+        finally:
+            await self.lease.release()
+        self.runs += 1
+        self.expired += report["modified"]
+        self.last_duration_seconds = time.perf_counter() - started
+        return report
+
+    async def migrate_dates(self) -> dict:
+        """Convertit les dates d'abonnement stockées en chaînes ("%Y-%m-%d %H:%M:%S", heure locale) en datetimes"""
+        report = {"scanned": 0, "migrated": 0, "invalid": 0}
+        operations = []
+        async for user in self.users.iter_string_subscription_dates(SUBSCRIPTION_DATE_FIELDS, self.chunk_size):
+            report["scanned"] += 1
+            fields = {}
+            for field in SUBSCRIPTION_DATE_FIELDS:
+                value = user["abonnement"].get(field)
+                if not isinstance(value, str):
+                    continue
+                try:
+                    fields[f"abonnement.{field}"] = parse_legacy_date(value)
+                except ValueError:
+                    report["invalid"] += 1
+            if fields:
+                operations.append(UpdateOne({"_id": user["_id"]}, {"$set": fields}))
+            if len(operations) >= self.chunk_size:
+                report["migrated"] += (await self.users.bulk_write(operations)).modified_count
+                operations = []
+        if operations:
+            report["migrated"] += (await self.users.bulk_write(operations)).modified_count
+        return report
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Erreur du balayage des abonnements: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self.enabled:
+            self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "expired": self.expired,
+            "last_duration_ms": self.last_duration_seconds * 1000,
+        }
+
+async def main(args):
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    database = Database(settings)
+    user_cache = UserCache(settings)
+    try:
+        await database.connect()
+        users = UserRepository(database)
+        await users.ensure_indexes()
+        sweeper = SubscriptionSweeper(settings, database, users, user_cache)
+        if args.migrate_dates:
+            print(json.dumps({"migrate_dates": await sweeper.migrate_dates()}))
+        report = await sweeper.sweep()
+        print(json.dumps({"sweep": report if report is not None else "verrou détenu par un autre worker"}))
+    finally:
+        await user_cache.close()
+        await database.close()
+
+if __name__ == "__main__":
+    # python -m app.services.subscription_sweeper [--migrate-dates]
+    parser = argparse.ArgumentParser(description="Expiration des abonnements")
+    parser.add_argument("--migrate-dates", action="store_true", help="convertit d'abord les dates stockées en chaînes")
+    asyncio.run(main(parser.parse_args()))
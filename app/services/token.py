@@ -0,0 +1,89 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import jwt
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
+from app.core.config import Settings
+from app.core.keys import KeyStore
+from app.core.metrics import timed
+
+class TokenService():
+    """Création et vérification des JWT d'accès.
+
+    Les tokens déjà vérifiés sont mis en cache (clé : SHA-256 du token complet,
+    signature incluse) jusqu'à leur `exp`, ce qui évite de refaire la
+    vérification de signature à chaque requête. Un token modifié ou forgé a
+    une autre empreinte et repasse donc toujours par jwt.decode.
+    """
+    def __init__(self, settings: Settings, keys: KeyStore):
+        self.settings = settings
+        self.keys = keys
+        self.cache_enabled = settings.JWT_DECODE_CACHE_ENABLED
+        self.cache_max_size = settings.JWT_DECODE_CACHE_SIZE
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def create_access_token(self, data: dict, expires_delta: timedelta = None):
+        to_encode = data.copy()
+        if expires_delta:
+            expire = datetime.now(timezone.utc) + expires_delta
+        else:
+            expire = datetime.now(timezone.utc) + timedelta(minutes=15)
+        to_encode.update({"exp": expire})
+        if self.settings.JWT_ISSUER:
+            to_encode["iss"] = self.settings.JWT_ISSUER
+        kid, key = self.keys.get_signing_key()
+        headers = {"kid": kid} if kid else None
+        with timed("jwt_encode"):
+            encoded_jwt = jwt.encode(to_encode, key, algorithm=self.settings.ALGORITHM, headers=headers)
+        return encoded_jwt
+
+    def _verify(self, token: str) -> dict:
+        header = jwt.get_unverified_header(token)
+        key = self.keys.get_verification_key(header.get("kid"))
+        if key is None:
+            raise InvalidTokenError("Clé de signature inconnue")
+        with timed("jwt_decode"):
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[self.settings.ALGORITHM],
+                issuer=self.settings.JWT_ISSUER,
+            )
+
+    def decode(self, token: str) -> dict:
+        """Retourne les claims d'un token valide, lève InvalidTokenError sinon"""
+        if not self.cache_enabled:
+            return self._verify(token)
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self.cache.get(key)
+        if entry is not None:
+            expires_at, claims = entry
+            if expires_at > time.time():
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return dict(claims)
+            del self.cache[key]
+            raise ExpiredSignatureError("Signature has expired")
+        self.misses += 1
+        claims = self._verify(token)
+        # Sans `exp`, le token n'expire jamais : on ne le garde pas en cache
+        if "exp" in claims:
+            self.cache[key] = (claims["exp"], claims)
+            while len(self.cache) > self.cache_max_size:
+                self.cache.popitem(last=False)
+        return dict(claims)
+
+    def clear_cache(self):
+        """À appeler quand les clés de signature changent"""
+        self.cache.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.cache_enabled,
+            "size": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
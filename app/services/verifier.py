@@ -0,0 +1,45 @@
+import jwt
+
+class TokenVerifier():
+    """Vérification hors ligne des tokens émis par le service d'authentification.
+
+    À importer par les autres services : le JWKS est téléchargé depuis
+    `/.well-known/jwks.json` puis gardé en cache `cache_seconds`. Un `kid`
+    inconnu (rotation de clé) déclenche un nouveau téléchargement.
+
+        verifier = TokenVerifier("http://auth:8000/.well-known/jwks.json")
+        claims = verifier.verify(token)
+
+    Le téléchargement du JWKS est synchrone (urllib) : dans un service
+    asynchrone, appeler `verify` via `asyncio.to_thread` ou précharger avec
+    `preload()` au démarrage.
+    """
+    def __init__(
+        self,
+        jwks_url: str,
+        algorithms: list[str] | None = None,
+        issuer: str | None = None,
+        cache_seconds: int = 300,
+        leeway: int = 0,
+    ):
+        self.algorithms = algorithms or ["RS256", "ES256", "EdDSA"]
+        self.issuer = issuer
+        self.leeway = leeway
+        self.jwk_client = jwt.PyJWKClient(jwks_url, cache_jwk_set=True, lifespan=cache_seconds)
+
+    def preload(self):
+        self.jwk_client.get_jwk_set(refresh=True)
+
+    def verify(self, token: str) -> dict:
+        """Retourne les claims du token, lève jwt.InvalidTokenError s'il est invalide"""
+        try:
+            signing_key = self.jwk_client.get_signing_key_from_jwt(token)
+        except jwt.PyJWKClientError as e:
+            raise jwt.InvalidTokenError(str(e)) from e
+        return jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=self.algorithms,
+            issuer=self.issuer,
+            leeway=self.leeway,
+        )
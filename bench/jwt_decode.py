@@ -0,0 +1,49 @@
+"""Microbenchmark : coût CPU de get_current_user pour le décodage du JWT.
+
+Compare jwt.decode à chaque requête (comportement historique) avec
+TokenService.decode et son cache de tokens vérifiés.
+
+    python -m bench.jwt_decode --iterations 100000
+"""
+import argparse
+import time
+from types import SimpleNamespace
+from datetime import timedelta
+import jwt
+from app.core.keys import KeyStore
+from app.services.token import TokenService
+
+def run(label: str, fn, token: str, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(token)
+    elapsed = time.perf_counter() - started
+    per_call_us = elapsed / iterations * 1_000_000
+    print(f"{label:<28} {per_call_us:8.2f} µs/appel")
+    return per_call_us
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--algorithm", default="HS256")
+    args = parser.parse_args()
+
+    settings = SimpleNamespace(
+        SECRET_KEY_JWT="bench-secret-key-with-enough-entropy-0123456789",
+        ALGORITHM=args.algorithm,
+        JWT_DECODE_CACHE_ENABLED=True,
+        JWT_DECODE_CACHE_SIZE=10000,
+        JWT_ISSUER=None,
+    )
+    tokens = TokenService(settings, KeyStore(settings))
+    token = tokens.create_access_token({"sub": "bench@example.com"}, timedelta(minutes=30))
+
+    def uncached(token):
+        return jwt.decode(token, settings.SECRET_KEY_JWT, algorithms=[settings.ALGORITHM])
+
+    baseline = run("jwt.decode", uncached, token, args.iterations)
+    cached = run("TokenService.decode (cache)", tokens.decode, token, args.iterations)
+    print(f"gain : {baseline - cached:.2f} µs/requête ({baseline / cached:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Test de charge : connexions légitimes pendant une attaque par bourrage d'identifiants.
+
+Reproduit le chemin CPU de /auth/token (limiteur puis bcrypt dans le pool de
+hachage) sans MongoDB, avec et sans limitation, et compare le débit et la
+latence des connexions légitimes.
+
+    python -m bench.login_attack --duration 10 --attackers 50 --users 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from app.services.hashing import HasherSaturatedError, PasswordHasher
+from app.services.rate_limit import LoginRateLimiter, RateLimitExceeded
+
+def make_settings(rate_limit: bool) -> SimpleNamespace:
+    return SimpleNamespace(
+        HASH_MAX_WORKERS=None,
+        HASH_QUEUE_DEPTH=32,
+        PASSWORD_HASH_SCHEME="bcrypt",
+        BCRYPT_ROUNDS=12,
+        ARGON2_TIME_COST=3,
+        ARGON2_MEMORY_COST_KIB=65536,
+        ARGON2_PARALLELISM=4,
+        LOGIN_RATE_LIMIT_ENABLED=rate_limit,
+        LOGIN_RATE_LIMIT_BACKEND="memory",
+        LOGIN_RATE_LIMIT_WINDOW_SECONDS=60,
+        LOGIN_RATE_LIMIT_PER_IP=30,
+        LOGIN_RATE_LIMIT_PER_EMAIL=10,
+        LOGIN_RATE_LIMIT_MAX_KEYS=100000,
+    )
+
+async def attempt(limiter: LoginRateLimiter, hasher: PasswordHasher, ip: str, email: str, password: str, hashed: str) -> str:
+    try:
+        await limiter.check(ip, email)
+        await hasher.verify(password, hashed)
+        return "ok"
+    except RateLimitExceeded:
+        return "429"
+    except HasherSaturatedError:
+        return "503"
+
+async def run(rate_limit: bool, args) -> dict:
+    settings = make_settings(rate_limit)
+    hasher = PasswordHasher(settings)
+    limiter = LoginRateLimiter(settings, database=None)
+    hashed = await hasher.hash("correct horse battery staple")
+    deadline = time.perf_counter() + args.duration
+    legit_latencies = []
+    outcomes = {"ok": 0, "429": 0, "503": 0}
+
+    async def attacker(n: int):
+        # Quelques IPs qui visent un même compte, sans pause
+        while time.perf_counter() < deadline:
+            outcome = await attempt(limiter, hasher, f"10.0.0.{n % 5}", "victim@example.com", "wrong", hashed)
+            if outcome != "ok":
+                await asyncio.sleep(0)
+
+    async def user(n: int):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            outcome = await attempt(limiter, hasher, f"192.168.1.{n}", f"user{n}@example.com", "correct horse battery staple", hashed)
+            outcomes[outcome] += 1
+            if outcome == "ok":
+                legit_latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(args.think_time)
+
+    await asyncio.gather(
+        *(attacker(n) for n in range(args.attackers)),
+        *(user(n) for n in range(args.users)),
+    )
+    hasher.shutdown()
+    legit_latencies.sort()
+    return {
+        "rate_limit": rate_limit,
+        "legit_logins_per_second": outcomes["ok"] / args.duration,
+        "legit_rejected_503": outcomes["503"],
+        "legit_rejected_429": outcomes["429"],
+        "p50_ms": statistics.median(legit_latencies) if legit_latencies else None,
+        "p99_ms": legit_latencies[max(0, int(len(legit_latencies) * 0.99) - 1)] if legit_latencies else None,
+        "limiter": limiter.get_stats(),
+        "hashing": hasher.get_stats(),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--attackers", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--think-time", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for rate_limit in (False, True):
+        result = await run(rate_limit, args)
+        print(
+            f"limiteur={'on ' if rate_limit else 'off'}  "
+            f"connexions légitimes {result['legit_logins_per_second']:6.1f}/s  "
+            f"503 {result['legit_rejected_503']:5d}  429 {result['legit_rejected_429']:5d}  "
+            f"p50 {result['p50_ms'] or 0:7.1f} ms  p99 {result['p99_ms'] or 0:7.1f} ms"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Benchmark : démarrage à froid d'un worker, STARTUP_MODE=eager contre lazy.
+
+Chaque mesure tourne dans un nouveau processus (modules non encore importés) :
+- import : `import main` ;
+- startup : lifespan (création du conteneur, pings MongoDB, index, préchargement OAuth) ;
+- première requête : POST /auth/token avec un compte inconnu (limiteur, lecture MongoDB, 401),
+  qui paie l'ouverture du pool en mode lazy.
+
+Utilise le mongod de MONGODB_URI (défaut mongodb://localhost:27017), comme bench.suite.
+
+    python -m bench.startup --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "time_to_first_request_ms")
+
+async def measure_child() -> dict:
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    app = main.app
+    lifespan = app.router.lifespan_context(app)
+    before_startup = time.perf_counter()
+    await lifespan.__aenter__()
+    started_up = time.perf_counter()
+    # Modules lourds chargés par l'application elle-même, avant le client de test
+    loaded = sorted(name for name in ("authlib", "httpx", "passlib", "pymongo") if name in sys.modules)
+    try:
+        import httpx
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            before_request = time.perf_counter()
+            resp = await client.post("/auth/token", json={"email": "startup@bench.local", "password": "x"})
+            answered = time.perf_counter()
+    finally:
+        await lifespan.__aexit__(None, None, None)
+    first_request = answered - before_request
+    return {
+        "status": resp.status_code,
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (started_up - before_startup) * 1000,
+        "first_request_ms": first_request * 1000,
+        "time_to_first_request_ms": (imported - started + started_up - before_startup + first_request) * 1000,
+        "loaded_modules": loaded,
+    }
+
+def run_child(mode: str) -> dict:
+    env = {**os.environ, "STARTUP_MODE": mode}
+    output = subprocess.check_output([sys.executable, "-m", "bench.startup", "--child"], env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("MONGODB_DB_NAME", "volleyball-bench")
+    if args.child:
+        print(json.dumps(asyncio.run(measure_child())))
+        return
+
+    print(f"{'mode':<6}" + "".join(f"{phase[:-3]:>26}" for phase in PHASES) + "  (médianes, ms)")
+    for mode in ("eager", "lazy"):
+        results = [run_child(mode) for _ in range(args.runs)]
+        line = f"{mode:<6}" + "".join(f"{statistics.median(r[phase] for r in results):>26.1f}" for phase in PHASES)
+        print(f"{line}  statut {results[-1]['status']}  modules {','.join(results[-1]['loaded_modules'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Suite de benchmark des endpoints d'authentification.
+
+Chaque utilisateur virtuel enchaîne en boucle : /auth/register, /auth/token,
+N x /auth/users/me puis /auth/logout, pendant `--duration` secondes. Le rapport
+donne par endpoint le débit, p50/p95/p99 et les codes d'erreur, ainsi que le
+retard de la boucle d'événements, et il est enregistré en JSON dans
+`bench/results/` pour comparer les commits entre eux.
+
+Cibles :
+- in-process (défaut) : `main:app` piloté via httpx.ASGITransport, lifespan compris.
+  La boucle d'événements est partagée avec l'application, le retard mesuré est
+  donc celui du serveur.
+- `--url http://127.0.0.1:8000` : un uvicorn déjà lancé (retard mesuré côté client).
+
+Les deux cibles utilisent le mongod local de MONGODB_URI (défaut
+mongodb://localhost:27017) et la base MONGODB_DB_NAME (défaut volleyball-bench).
+La limitation des connexions est désactivée sauf avec `--rate-limit`.
+
+    make bench BENCH_ARGS="--users 50 --duration 30"
+    python -m bench.suite --compare bench/results/<précédent>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+
+ENDPOINTS = ["/auth/register", "/auth/token", "/auth/users/me", "/auth/logout"]
+RESULTS_DIR = Path(__file__).parent / "results"
+
+def percentile(values: list, q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+class Recorder():
+    def __init__(self):
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.statuses = {endpoint: {} for endpoint in ENDPOINTS}
+
+    async def call(self, client: httpx.AsyncClient, method: str, endpoint: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, endpoint, **kwargs)
+            status = str(resp.status_code)
+        except httpx.HTTPError as e:
+            resp = None
+            status = type(e).__name__
+        self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+        self.statuses[endpoint][status] = self.statuses[endpoint].get(status, 0) + 1
+        return resp
+
+class LoopLagMonitor():
+    """Mesure le retard de réveil d'une tâche qui dort `interval` secondes"""
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (time.perf_counter() - started - self.interval) * 1000))
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+async def virtual_user(make_client, recorder: Recorder, deadline: float, me_per_session: int, password: str):
+    while time.perf_counter() < deadline:
+        async with make_client() as client:
+            email = f"bench-{uuid.uuid4().hex}@bench.local"
+            await recorder.call(client, "POST", "/auth/register", json={"email": email, "password": password})
+            resp = await recorder.call(client, "POST", "/auth/token", json={"email": email, "password": password})
+            if resp is not None and resp.status_code == 200:
+                for _ in range(me_per_session):
+                    if time.perf_counter() >= deadline:
+                        break
+                    await recorder.call(client, "GET", "/auth/users/me")
+            await recorder.call(client, "POST", "/auth/logout")
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_report(args, recorder: Recorder, lag: LoopLagMonitor, elapsed: float) -> dict:
+    endpoints = {}
+    total = 0
+    for endpoint in ENDPOINTS:
+        latencies = recorder.latencies[endpoint]
+        total += len(latencies)
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "statuses": recorder.statuses[endpoint],
+        }
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "target": args.url or "in-process",
+        "users": args.users,
+        "duration_seconds": elapsed,
+        "me_per_session": args.me_per_session,
+        "total_rps": total / elapsed,
+        "endpoints": endpoints,
+        "event_loop_lag_ms": {
+            "p50": percentile(lag.samples, 50),
+            "p99": percentile(lag.samples, 99),
+            "max": max(lag.samples) if lag.samples else None,
+        },
+    }
+
+def print_report(report: dict, previous: dict | None):
+    print(f"commit {report['commit']}  cible {report['target']}  {report['users']} utilisateurs  {report['total_rps']:.1f} req/s")
+    print(f"{'endpoint':<18}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}  statuts")
+    for endpoint, stats in report["endpoints"].items():
+        line = f"{endpoint:<18}{stats['rps']:>9.1f}"
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            line += f"{stats[key]:>10.1f}" if stats[key] is not None else f"{'-':>10}"
+        line += f"  {stats['statuses']}"
+        if previous and previous["endpoints"].get(endpoint, {}).get("p99_ms") and stats["p99_ms"]:
+            before = previous["endpoints"][endpoint]["p99_ms"]
+            line += f"  p99 {(stats['p99_ms'] - before) / before * 100:+.0f}% vs {previous['commit']}"
+        print(line)
+    lag = report["event_loop_lag_ms"]
+    if lag["p50"] is not None:
+        print(f"retard de la boucle : p50 {lag['p50']:.2f} ms  p99 {lag['p99']:.2f} ms  max {lag['max']:.2f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20, help="utilisateurs virtuels concurrents")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--me-per-session", type=int, default=20)
+    parser.add_argument("--url", help="serveur uvicorn à cibler au lieu de main:app in-process")
+    parser.add_argument("--rate-limit", action="store_true", help="garde la limitation de /auth/token")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="rapport JSON précédent")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("MONGODB_DB_NAME", "volleyball-bench")
+    if not args.rate_limit:
+        os.environ["LOGIN_RATE_LIMIT_ENABLED"] = "false"
+    password = "bench-password"
+
+    lag = LoopLagMonitor()
+    recorder = Recorder()
+    if args.url:
+        limits = httpx.Limits(max_keepalive_connections=args.users)
+        make_client = lambda: httpx.AsyncClient(base_url=args.url, limits=limits)
+        lifespan = None
+    else:
+        from main import app
+        transport = httpx.ASGITransport(app=app)
+        make_client = lambda: httpx.AsyncClient(transport=transport, base_url="http://testserver")
+        lifespan = app.router.lifespan_context(app)
+
+    if lifespan is not None:
+        await lifespan.__aenter__()
+    try:
+        lag.start()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(make_client, recorder, deadline, args.me_per_session, password)
+            for _ in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+        await lag.stop()
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+    report = build_report(args, recorder, lag, elapsed)
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(report, previous)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{report['commit'] or 'nocommit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"résultats : {output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
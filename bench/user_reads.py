@@ -0,0 +1,82 @@
+"""Benchmark : coût d'un /auth/users/me, lecture complète vs lecture projetée.
+
+Compare, pour un document utilisateur Google typique (hash bcrypt, id_token,
+abonnement, dates) :
+- les octets BSON renvoyés par MongoDB (document complet vs PROFILE_PROJECTION) ;
+- le CPU côté application : UserInDB(**document) + JSONResponse (avant) contre
+  User.from_trusted(profil) + ORJSONResponse (après).
+
+    python -m bench.user_reads --iterations 50000
+"""
+import argparse
+import secrets
+import time
+from datetime import datetime, timezone
+import bson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.models.user import User, UserInDB
+from app.repositories.user import PROFILE_PROJECTION
+
+def sample_document() -> dict:
+    return {
+        "_id": bson.ObjectId(),
+        "provider": "google",
+        "provider_id": "1" * 21,
+        "email": "joueuse@example.com",
+        "name": "Joueuse Exemple",
+        "picture": "https://lh3.googleusercontent.com/a/" + secrets.token_urlsafe(48),
+        "password": "$2b$12$" + secrets.token_urlsafe(40)[:53],
+        "expires_at": 1760000000,
+        # Un id_token Google fait typiquement 1 à 1,5 Ko
+        "id_token": ".".join(secrets.token_urlsafe(n) for n in (60, 700, 256)),
+        "abonnement": {
+            "type_abonnement": "premium",
+            "date_debut": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "date_fin": datetime(2026, 1, 1, tzinfo=timezone.utc),
+            "status": True,
+            "prix": 9.99,
+            "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "updated_at": None,
+        },
+        "created_at": "2025-01-01 00:00:00",
+        "updated_at": "2025-06-01 00:00:00",
+    }
+
+def project(document: dict, projection: dict) -> dict:
+    return {key: value for key, value in document.items() if projection.get(key)}
+
+def measure(label: str, fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call_us = (time.perf_counter() - started) / iterations * 1_000_000
+    print(f"{label:<34} {per_call_us:8.2f} µs/appel")
+    return per_call_us
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    document = sample_document()
+    profile = project(document, PROFILE_PROJECTION)
+    full_bytes = len(bson.encode(document))
+    profile_bytes = len(bson.encode(profile))
+    print(f"{'octets BSON document complet':<34} {full_bytes:8d}")
+    print(f"{'octets BSON profil projeté':<34} {profile_bytes:8d}  ({profile_bytes / full_bytes:.0%})")
+
+    def before():
+        user = UserInDB(**document)
+        return JSONResponse(jsonable_encoder(user)).body
+
+    def after():
+        user = User.from_trusted(profile)
+        return ORJSONResponse(user.model_dump()).body
+
+    baseline = measure("avant : validation + JSONResponse", before, args.iterations)
+    lean = measure("après : from_trusted + ORJSON", after, args.iterations)
+    print(f"gain CPU : {baseline - lean:.2f} µs/requête ({baseline / lean:.1f}x)")
+
+if __name__ == "__main__":
+    main()
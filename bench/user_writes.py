@@ -0,0 +1,128 @@
+"""Benchmark : inscription et connexion OAuth, avant / après les index et l'upsert.
+
+Remplit une base de test avec N utilisateurs (1 000 000 par défaut) puis mesure,
+pour chaque scénario, le nombre d'allers-retours MongoDB et la latence :
+
+- legacy : find_one + insert_one + find_one, sans index (comportement historique)
+- atomic : insert_one / find_one_and_update(upsert) avec les index uniques
+
+    MONGODB_URI=mongodb://localhost:27017 python -m bench.user_writes --users 1000000
+
+La base `--db` (volleyball-bench par défaut) est supprimée au début du benchmark.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from pymongo import AsyncMongoClient, monitoring
+from pymongo.errors import DuplicateKeyError
+from app.repositories.user import UserRepository
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+class BenchDatabase:
+    """Ersatz minimal de app.core.database.Database pour UserRepository"""
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_users_collection(self):
+        return self.collection
+
+async def seed(collection, users: int, batch_size: int = 10_000):
+    for start in range(0, users, batch_size):
+        await collection.insert_many([
+            {
+                "provider": "github",
+                "provider_id": str(i),
+                "email": f"user{i}@bench.local",
+                "name": f"user{i}",
+                "created_at": "2025-01-01 00:00:00",
+            }
+            for i in range(start, min(start + batch_size, users))
+        ], ordered=False)
+
+async def legacy_register(collection, email: str):
+    if await collection.find_one({"email": email}):
+        return None
+    result = await collection.insert_one({"email": email, "password": "x"})
+    return await collection.find_one({"_id": result.inserted_id})
+
+async def legacy_oauth_login(collection, provider_id: str):
+    existing = await collection.find_one({"provider_id": provider_id})
+    if not existing:
+        await collection.insert_one({"provider": "github", "provider_id": provider_id, "email": f"gh{provider_id}@bench.local"})
+    else:
+        await collection.update_one({"provider_id": provider_id}, {"$set": {"updated_at": "now"}})
+
+async def atomic_register(users: UserRepository, email: str):
+    try:
+        return await users.insert({"email": email, "password": "x"})
+    except DuplicateKeyError:
+        return None
+
+async def atomic_oauth_login(users: UserRepository, provider_id: str):
+    return await users.upsert_provider_user(
+        "github", provider_id,
+        on_insert={"email": f"gh{provider_id}@bench.local"},
+        on_update={"updated_at": "now"},
+    )
+
+async def measure(label: str, counter: CommandCounter, fn, keys: list):
+    latencies = []
+    before = counter.count
+    for key in keys:
+        started = time.perf_counter()
+        await fn(key)
+        latencies.append((time.perf_counter() - started) * 1000)
+    round_trips = (counter.count - before) / len(keys)
+    latencies.sort()
+    print(
+        f"{label:<26} {round_trips:4.1f} allers-retours  "
+        f"p50 {statistics.median(latencies):8.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:8.2f} ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument("--db", default="volleyball-bench")
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = AsyncMongoClient(os.environ.get("MONGODB_URI", "mongodb://localhost:27017"), event_listeners=[counter])
+    await client.drop_database(args.db)
+    collection = client[args.db]["users"]
+    print(f"Remplissage de {args.users} utilisateurs...")
+    await seed(collection, args.users)
+
+    existing = [str(i) for i in range(0, args.users, max(1, args.users // args.operations))][:args.operations]
+    print("legacy (sans index)")
+    await measure("  inscription", counter, lambda i: legacy_register(collection, f"legacy{i}@bench.local"), range(args.operations))
+    await measure("  connexion OAuth existante", counter, lambda pid: legacy_oauth_login(collection, pid), existing)
+    await collection.delete_many({"email": {"$regex": "^legacy"}})
+
+    users = UserRepository(BenchDatabase(collection))
+    await users.ensure_indexes()
+    print("atomic (index uniques)")
+    await measure("  inscription", counter, lambda i: atomic_register(users, f"atomic{i}@bench.local"), range(args.operations))
+    await measure("  connexion OAuth existante", counter, lambda pid: atomic_oauth_login(users, pid), existing)
+    await measure("  connexion OAuth nouvelle", counter, lambda i: atomic_oauth_login(users, f"new{i}"), range(args.operations))
+
+    await client.drop_database(args.db)
+    await client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
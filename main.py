@@ -1,13 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.routes.auth import AuthRouter
+from app.routes.admin import AdminRouter
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from app.core.config import Settings
-
-app = FastAPI()
+from app.core.config import get_settings
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.errors import HasherSaturatedError, RateLimitExceeded, ServiceNotReadyError
 
+settings = get_settings()
 auth_router = AuthRouter()
-settings = Settings()
+admin_router = AdminRouter()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importé ici : `import main` ne charge ni pymongo, ni passlib, ni Authlib
+    from app.core.container import Container
+
+    # Un seul client MongoDB (et un seul pool) par worker
+    container = Container(settings)
+    await container.startup()
+    app.state.container = container
+    auth_router.bind(container)
+    admin_router.bind(container)
+    registry.register_collector(container.get_metrics)
+    try:
+        yield
+    finally:
+        registry.unregister_collector(container.get_metrics)
+        await container.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(SessionMiddleware, 
                     secret_key=settings.SECRET_KEY,
@@ -19,9 +43,55 @@ app.add_middleware(CORSMiddleware,
                     allow_credentials=True, 
                     allow_methods=["GET", "POST", "PUT", "DELETE"], 
                     allow_headers=["Content-Type", "Authorization", "X-CSRF-Token"])
+# Ajouté en dernier : englobe les autres middlewares dans la mesure de latence
+app.add_middleware(MetricsMiddleware)
 app.include_router(auth_router.get_router())
+app.include_router(admin_router.get_router())
+
+@app.exception_handler(HasherSaturatedError)
+async def hasher_saturated_handler(request: Request, exc: HasherSaturatedError):
+    # Le pool de hachage est plein : on demande au client de réessayer
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service surchargé, réessayez plus tard"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(ServiceNotReadyError)
+async def service_not_ready_handler(request: Request, exc: ServiceNotReadyError):
+    # Démarrage lazy : les index uniques des utilisateurs ne sont pas encore créés
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service en cours de démarrage, réessayez plus tard"},
+        headers={"Retry-After": "5"},
+    )
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Trop de tentatives, réessayez plus tard"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 @app.get("/", tags=["root"])
 async def root():
     return {"message": "Bienvenue sur l'API Auth avec Oauth2"}
 
+@app.get("/.well-known/jwks.json", tags=["root"])
+async def jwks():
+    """Clés publiques de signature des JWT, pour la vérification hors ligne"""
+    return JSONResponse(
+        content=app.state.container.keys.get_jwks(),
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}"},
+    )
+
+@app.get("/metrics", tags=["root"])
+async def metrics():
+    """Métriques au format texte Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health", tags=["root"])
+async def health():
+    """Statistiques du pool de connexions MongoDB"""
+    return {"status": "ok", **app.state.container.get_stats()}
@@ -0,0 +1,53 @@
+import os
+
+# Configuration de test, posée avant le premier get_settings() (mis en cache)
+os.environ.update({
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "SECRET_KEY": "test-secret",
+    "SECRET_KEY_JWT": "test-jwt-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+    "GOOGLE_CLIENT_ID": "google-client",
+    "GOOGLE_CLIENT_SECRET": "google-secret",
+    "GITHUB_CLIENT_ID": "github-client",
+    "GITHUB_CLIENT_SECRET": "github-secret",
+    "ENVIRONMENT": "test",
+    # Coût bcrypt minimal : les tests mesurent la boucle, pas bcrypt
+    "BCRYPT_ROUNDS": "4",
+    # Discovery injoignable : le préchargement échoue immédiatement sans réseau
+    "GOOGLE_DISCOVERY_URL": "http://127.0.0.1:9/.well-known/openid-configuration",
+    "LOGIN_RATE_LIMIT_ENABLED": "false",
+    "SUBSCRIPTION_SWEEP_ENABLED": "false",
+})
+
+import httpx
+import pytest
+from app.core import container as container_module
+from tests.fakes import FakeDatabase
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def database(monkeypatch):
+    """FakeDatabase partagée par le conteneur créé dans le lifespan"""
+    database = FakeDatabase()
+    monkeypatch.setattr(container_module, "Database", lambda settings: database)
+    return database
+
+@pytest.fixture
+async def app(database):
+    """main:app avec son lifespan (conteneur branché sur la FakeDatabase)"""
+    from main import app
+    async with app.router.lifespan_context(app):
+        yield app
+
+def make_client(app) -> httpx.AsyncClient:
+    """Un client par utilisateur simulé : chacun garde ses propres cookies"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+
+@pytest.fixture
+async def client(app):
+    async with make_client(app) as client:
+        yield client
@@ -0,0 +1,347 @@
+"""Remplaçant en mémoire de Database pour les tests, sans mongod.
+
+Chaque opération attend `latency` secondes : avec `blocking=False` l'attente
+est un `asyncio.sleep` (comportement d'un driver asynchrone), avec
+`blocking=True` un `time.sleep` qui bloque la boucle comme un driver synchrone.
+`failures[opération] = n` fait échouer les n prochains appels (MongoDB injoignable).
+Seules les opérations et les opérateurs utilisés par l'application sont gérés.
+"""
+import asyncio
+import copy
+import time
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError
+
+_MISSING = object()
+
+def _get(document: dict, path: str):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+def _set(document: dict, path: str, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+def _unset(document: dict, path: str):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+def _compare(value, condition) -> bool:
+    if not isinstance(condition, dict) or not any(key.startswith("$") for key in condition):
+        return value is not _MISSING and value == condition
+    for operator, operand in condition.items():
+        if operator == "$in":
+            ok = value is not _MISSING and value in operand
+        elif operator == "$ne":
+            ok = value is _MISSING or value != operand
+        elif operator == "$type":
+            ok = operand == "string" and isinstance(value, str)
+        elif operator in ("$lt", "$lte", "$gt", "$gte"):
+            if value is _MISSING or type(value) is not type(operand):
+                return False
+            ok = {"$lt": value < operand, "$lte": value <= operand, "$gt": value > operand, "$gte": value >= operand}[operator]
+        else:
+            raise NotImplementedError(operator)
+        if not ok:
+            return False
+    return True
+
+def matches(document: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif not _compare(_get(document, key), condition):
+            return False
+    return True
+
+def project(document: dict, projection: dict | None) -> dict:
+    if projection is None:
+        return copy.deepcopy(document)
+    included = [key for key, value in projection.items() if value and key != "_id"]
+    result = {key: copy.deepcopy(document[key]) for key in included if key in document}
+    if projection.get("_id", 1) and "_id" in document:
+        result["_id"] = document["_id"]
+    return result
+
+def evaluate(document: dict, expression):
+    """Expressions d'agrégation utilisées par les mises à jour par pipeline"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get(document, expression[1:])
+        return None if value is _MISSING else value
+    if not isinstance(expression, dict) or not expression:
+        return expression
+    (operator, operands), = expression.items()
+    values = [evaluate(document, operand) for operand in operands]
+    if operator == "$cond":
+        return values[1] if values[0] else values[2]
+    if operator == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if operator == "$eq":
+        return values[0] == values[1]
+    if operator == "$lt":
+        return values[0] < values[1]
+    if operator == "$add":
+        return sum(values)
+    if operator == "$multiply":
+        return values[0] * values[1]
+    raise NotImplementedError(operator)
+
+class FakeCursor():
+    def __init__(self, collection: "FakeCollection", documents: list[dict]):
+        self.collection = collection
+        self.documents = documents
+
+    def sort(self, key: str, direction: int = 1):
+        self.documents.sort(key=lambda document: _get(document, key), reverse=direction < 0)
+        return self
+
+    def limit(self, count: int):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        await self.collection.database.wait()
+        return self.documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self.collection.database.wait()
+        for document in self.documents:
+            yield document
+
+class FakeCollection():
+    def __init__(self, database: "FakeDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.documents = []
+        self.indexes = {"_id_": {"key": [("_id", 1)], "unique": True}}
+
+    def _unique_conflict(self, candidate: dict, ignore: dict | None = None) -> bool:
+        for index in self.indexes.values():
+            if not index.get("unique"):
+                continue
+            keys = [key for key, _ in index["key"]]
+            values = [_get(candidate, key) for key in keys]
+            if all(value is _MISSING for value in values):
+                continue
+            partial = index.get("partialFilterExpression")
+            if partial and not matches(candidate, partial):
+                continue
+            for document in self.documents:
+                if document is ignore or (partial and not matches(document, partial)):
+                    continue
+                if [_get(document, key) for key in keys] == values:
+                    return True
+        return False
+
+    def _insert(self, document: dict) -> ObjectId:
+        document = copy.deepcopy(document)
+        document.setdefault("_id", ObjectId())
+        if self._unique_conflict(document):
+            raise DuplicateKeyError("E11000 duplicate key error", code=11000)
+        self.documents.append(document)
+        return document["_id"]
+
+    def _apply(self, document: dict, update: dict | list, inserting: bool):
+        if isinstance(update, list):
+            for stage in update:
+                (operator, fields), = stage.items()
+                if operator != "$set":
+                    raise NotImplementedError(operator)
+                # Toutes les expressions d'une étape lisent le document d'entrée
+                values = {path: evaluate(document, expression) for path, expression in fields.items()}
+                for path, value in values.items():
+                    _set(document, path, value)
+            return
+        for operator, fields in update.items():
+            if operator == "$setOnInsert" and not inserting:
+                continue
+            for path, value in fields.items():
+                if operator in ("$set", "$setOnInsert"):
+                    _set(document, path, copy.deepcopy(value))
+                elif operator == "$inc":
+                    current = _get(document, path)
+                    _set(document, path, (0 if current is _MISSING else current) + value)
+                elif operator == "$unset":
+                    _unset(document, path)
+                else:
+                    raise NotImplementedError(operator)
+
+    def _update(self, query: dict, update: dict, upsert: bool) -> tuple[dict | None, dict | None]:
+        """Retourne (avant, après) ; avant vaut None pour une insertion"""
+        for document in self.documents:
+            if matches(document, query):
+                before = copy.deepcopy(document)
+                updated = copy.deepcopy(document)
+                self._apply(updated, update, inserting=False)
+                if self._unique_conflict(updated, ignore=document):
+                    raise DuplicateKeyError("E11000 duplicate key error", code=11000)
+                document.clear()
+                document.update(updated)
+                return before, document
+        if not upsert:
+            return None, None
+        document = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        self._apply(document, update, inserting=True)
+        self._insert(document)
+        return None, self.documents[-1]
+
+    async def create_index(self, keys, unique: bool = False, name: str | None = None, **options):
+        await self.database.wait()
+        self.database.check_failure("create_index")
+        if unique:
+            candidate_keys = [key for key, _ in keys]
+            seen = set()
+            partial = options.get("partialFilterExpression")
+            for document in self.documents:
+                if partial and not matches(document, partial):
+                    continue
+                values = tuple(repr(_get(document, key)) for key in candidate_keys)
+                if values in seen:
+                    raise DuplicateKeyError("E11000 duplicate key error building index", code=11000)
+                seen.add(values)
+        self.indexes[name or "_".join(key for key, _ in keys)] = {"key": list(keys), "unique": unique, **options}
+        return name
+
+    async def index_information(self) -> dict:
+        await self.database.wait()
+        return copy.deepcopy(self.indexes)
+
+    async def find_one(self, query: dict | None = None, projection: dict | None = None):
+        await self.database.wait()
+        for document in self.documents:
+            if matches(document, query or {}):
+                return project(document, projection)
+        return None
+
+    def find(self, query: dict | None = None, projection: dict | None = None, batch_size: int | None = None):
+        documents = [project(document, projection) for document in self.documents if matches(document, query or {})]
+        return FakeCursor(self, documents)
+
+    async def insert_one(self, document: dict):
+        await self.database.wait()
+        inserted_id = self._insert(document)
+        document["_id"] = inserted_id
+        return type("InsertOneResult", (), {"inserted_id": inserted_id})()
+
+    async def insert_many(self, documents: list[dict], ordered: bool = True):
+        await self.database.wait()
+        inserted_ids, errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted_ids.append(self._insert(document))
+            except DuplicateKeyError:
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key error"})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"nInserted": len(inserted_ids), "writeErrors": errors})
+        return type("InsertManyResult", (), {"inserted_ids": inserted_ids})()
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        await self.database.wait()
+        before, after = self._update(query, update, upsert)
+        return type("UpdateResult", (), {"matched_count": int(after is not None), "modified_count": int(before is not None and before != after)})()
+
+    async def find_one_and_update(self, query: dict, update: dict, projection: dict | None = None, upsert: bool = False, return_document=False, **kwargs):
+        await self.database.wait()
+        self.database.check_failure("find_one_and_update")
+        before, after = self._update(query, update, upsert)
+        result = after if return_document else before
+        return project(result, projection) if result is not None else None
+
+    async def delete_one(self, query: dict):
+        await self.database.wait()
+        for document in self.documents:
+            if matches(document, query):
+                self.documents.remove(document)
+                return type("DeleteResult", (), {"deleted_count": 1})()
+        return type("DeleteResult", (), {"deleted_count": 0})()
+
+    async def delete_many(self, query: dict):
+        await self.database.wait()
+        kept = [document for document in self.documents if not matches(document, query)]
+        deleted = len(self.documents) - len(kept)
+        self.documents = kept
+        return type("DeleteResult", (), {"deleted_count": deleted})()
+
+    async def aggregate(self, pipeline: list[dict]) -> FakeCursor:
+        """$group sur un ou plusieurs champs avec compteurs $sum, $match et $limit (contrôle des doublons)"""
+        await self.database.wait()
+        rows = [copy.deepcopy(document) for document in self.documents]
+        for stage in pipeline:
+            (operator, spec), = stage.items()
+            if operator == "$group":
+                groups = {}
+                for row in rows:
+                    if isinstance(spec["_id"], dict):
+                        key = {name: _get(row, path.lstrip("$")) for name, path in spec["_id"].items()}
+                    else:
+                        key = _get(row, spec["_id"].lstrip("$"))
+                    group = groups.setdefault(repr(key), {"_id": None if key is _MISSING else key})
+                    for field, accumulator in spec.items():
+                        if field != "_id":
+                            group[field] = group.get(field, 0) + accumulator["$sum"]
+                rows = list(groups.values())
+            elif operator == "$match":
+                rows = [row for row in rows if matches(row, spec)]
+            elif operator == "$limit":
+                rows = rows[:spec]
+            else:
+                raise NotImplementedError(operator)
+        return FakeCursor(self, rows)
+
+class FakeDatabase():
+    """Même interface que app.core.database.Database"""
+    latency = 0.0
+    blocking = False
+
+    def __init__(self, settings=None):
+        self.collections = {}
+        self.operations = 0
+        self.failures = {}
+
+    async def wait(self):
+        self.operations += 1
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+
+    def check_failure(self, operation: str):
+        if self.failures.get(operation):
+            self.failures[operation] -= 1
+            raise AutoReconnect(f"{operation} : serveur injoignable")
+
+    def get_db(self):
+        return self
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    def get_users_collection(self) -> FakeCollection:
+        return self["users"]
+
+    async def connect(self):
+        await self.wait()
+
+    def get_pool_stats(self) -> dict:
+        return {"operations": self.operations}
+
+    async def close(self):
+        pass
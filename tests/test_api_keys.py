@@ -0,0 +1,23 @@
+"""Routes internes et d'administration protégées par clé d'API"""
+import pytest
+from app.core.config import get_settings
+
+pytestmark = pytest.mark.anyio
+
+ROUTES = [
+    ("INTERNAL_API_KEY", "X-Internal-Key", "POST", "/auth/introspect", {"tokens": []}),
+    ("ADMIN_API_KEY", "X-Admin-Key", "GET", "/admin/users/export", None),
+]
+
+@pytest.mark.parametrize("setting_name, header, method, url, body", ROUTES)
+async def test_routes_are_closed_without_a_configured_key(client, monkeypatch, setting_name, header, method, url, body):
+    monkeypatch.setattr(get_settings(), setting_name, None)
+    resp = await client.request(method, url, json=body, headers={header: "anything"})
+    assert resp.status_code == 403
+
+@pytest.mark.parametrize("setting_name, header, method, url, body", ROUTES)
+async def test_routes_require_the_matching_key(client, monkeypatch, setting_name, header, method, url, body):
+    monkeypatch.setattr(get_settings(), setting_name, "s3cret")
+    assert (await client.request(method, url, json=body)).status_code == 403
+    assert (await client.request(method, url, json=body, headers={header: "wrong"})).status_code == 403
+    assert (await client.request(method, url, json=body, headers={header: "s3cret"})).status_code == 200
@@ -0,0 +1,81 @@
+"""La couche d'accès aux données ne bloque jamais la boucle d'événements.
+
+La FakeDatabase fait attendre chaque opération MongoDB : si une route appelait
+un driver synchrone, la sonde verrait un retard de l'ordre de cette latence.
+"""
+import asyncio
+import time
+import uuid
+import pytest
+from tests.conftest import make_client
+
+pytestmark = pytest.mark.anyio
+
+LATENCY = 0.1
+
+class LoopLagProbe():
+    """Mesure le retard de réveil d'une tâche qui dort `interval` secondes"""
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = []
+        self.sleep_started = None
+        self.task = None
+
+    async def _run(self):
+        while True:
+            self.sleep_started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - self.sleep_started - self.interval)
+
+    async def __aenter__(self):
+        self.task = asyncio.create_task(self._run())
+        # La sonde dort déjà quand la charge commence
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Attente en cours : un blocage qui dure jusqu'à la fin compte aussi
+        if self.sleep_started is not None:
+            self.samples.append(max(0.0, time.perf_counter() - self.sleep_started - self.interval))
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+    @property
+    def max_lag(self) -> float:
+        return max(self.samples)
+
+async def user_session(app, me_calls: int = 3):
+    email = f"loop-{uuid.uuid4().hex}@test.local"
+    credentials = {"email": email, "password": "correct horse"}
+    async with make_client(app) as client:
+        assert (await client.post("/auth/register", json=credentials)).status_code == 200
+        assert (await client.post("/auth/token", json=credentials)).status_code == 200
+        for _ in range(me_calls):
+            resp = await client.get("/auth/users/me")
+            assert resp.status_code == 200
+            assert resp.json()["email"] == email
+
+async def test_concurrent_auth_routes_do_not_block_the_loop(app, database):
+    database.latency = LATENCY
+    operations = database.operations
+    started = time.perf_counter()
+    async with LoopLagProbe() as probe:
+        await asyncio.gather(*(user_session(app) for _ in range(20)))
+    elapsed = time.perf_counter() - started
+
+    # Au moins 4 allers-retours MongoDB par session (inscription, identifiants,
+    # refresh token, profil : les /users/me suivants passent par le cache)
+    assert database.operations - operations >= 20 * 4
+    # En série, il faudrait au moins 80 x LATENCY : les attentes se recouvrent
+    assert elapsed < 20 * 4 * LATENCY / 2
+    assert probe.samples
+    assert probe.max_lag < LATENCY, f"retard maximal {probe.max_lag * 1000:.1f} ms"
+
+async def test_probe_detects_a_blocking_data_layer(app, database):
+    # Témoin : la même charge sur un driver synchrone bloque la boucle à chaque requête
+    database.latency = LATENCY
+    database.blocking = True
+    async with LoopLagProbe() as probe:
+        await user_session(app, me_calls=1)
+    assert probe.samples
+    assert probe.max_lag >= LATENCY * 0.8
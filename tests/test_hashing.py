@@ -0,0 +1,31 @@
+"""Hachage par lots sous contention du pool"""
+import asyncio
+import pytest
+from app.core.config import get_settings
+from app.services.hashing import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(get_settings().model_copy(update={"HASH_MAX_WORKERS": 2, "HASH_QUEUE_DEPTH": 0}))
+    yield hasher
+    hasher.shutdown()
+
+async def test_hash_many_only_retries_rejected_entries(hasher):
+    passwords = [f"password-{i}" for i in range(7)]
+    # Une connexion interactive occupe un emplacement : chaque vague est à moitié refusée
+    hasher.pending = 1
+
+    async def release():
+        await asyncio.sleep(0.25)
+        hasher.pending -= 1
+
+    release_task = asyncio.create_task(release())
+    hashes = await hasher.hash_many(passwords)
+    await release_task
+
+    assert hasher.rejected > 0
+    assert hasher.timings["hash"].count == len(passwords)
+    for password, hashed in zip(passwords, hashes):
+        assert await hasher.verify(password, hashed)
@@ -0,0 +1,49 @@
+"""Noms de span du middleware de métriques : jamais le chemin brut de la requête"""
+from contextlib import contextmanager
+import pytest
+from app.core import metrics
+from tests.conftest import make_client
+
+pytestmark = pytest.mark.anyio
+
+class RecordingSpan():
+    def __init__(self, name: str):
+        self.name = name
+        self.attributes = {}
+
+    def update_name(self, name: str):
+        self.name = name
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+class RecordingTracer():
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def start_as_current_span(self, name: str):
+        self.spans.append(RecordingSpan(name))
+        yield self.spans[-1]
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = RecordingTracer()
+    monkeypatch.setattr(metrics, "_tracer", tracer)
+    return tracer
+
+async def test_span_is_named_after_the_route_template(app, tracer):
+    async with make_client(app) as client:
+        resp = await client.get("/auth/users/me")
+    assert resp.status_code == 401
+    request_span = tracer.spans[0]
+    assert request_span.name == "GET /auth/users/me"
+    assert request_span.attributes == {"http.route": "/auth/users/me", "http.response.status_code": 401}
+
+async def test_unmatched_path_keeps_the_method_only(app, tracer):
+    async with make_client(app) as client:
+        resp = await client.get("/reset/9f8e7d6c5b4a")
+    assert resp.status_code == 404
+    request_span = tracer.spans[0]
+    assert request_span.name == "GET"
+    assert request_span.attributes["http.route"] == "unmatched"
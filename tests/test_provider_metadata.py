@@ -0,0 +1,173 @@
+"""Cache des métadonnées OAuth, avec un serveur HTTP local à la place de Google"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from authlib.jose import JsonWebKey, jwt
+from app.core.config import get_settings
+from app.core.container import Container
+from app.services.oauth_provider import OAuthProviderService
+from app.services.provider_metadata import ProviderMetadataCache
+
+pytestmark = pytest.mark.anyio
+
+class ProviderStub():
+    """Discovery OIDC et JWKS servis localement ; `failing` renvoie des 500"""
+    def __init__(self):
+        self.hits = {"/discovery": 0, "/jwks": 0}
+        self.failing = False
+        self.keys = []
+        self.issuer = "https://issuer.test"
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits[self.path] = stub.hits.get(self.path, 0) + 1
+                if stub.failing:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                if self.path == "/discovery":
+                    body = {
+                        "issuer": stub.issuer,
+                        "authorization_endpoint": f"{stub.url}/authorize",
+                        "jwks_uri": f"{stub.url}/jwks",
+                        "id_token_signing_alg_values_supported": ["RS256"],
+                    }
+                else:
+                    body = {"keys": [key.as_dict(is_private=False) for key in stub.keys]}
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+def make_key(kid: str):
+    return JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": kid})
+
+@pytest.fixture
+def stub():
+    with ProviderStub() as stub:
+        stub.keys = [make_key("old")]
+        yield stub
+
+def make_settings(stub: ProviderStub, ttl: float = 3600, min_refresh: float = 60):
+    return get_settings().model_copy(update={
+        "GOOGLE_DISCOVERY_URL": f"{stub.url}/discovery",
+        "OAUTH_METADATA_TTL_SECONDS": ttl,
+        "OAUTH_JWKS_MIN_REFRESH_SECONDS": min_refresh,
+        "OAUTH_HTTP_TIMEOUT_SECONDS": 2,
+    })
+
+def make_id_token(stub: ProviderStub, key, settings) -> dict:
+    now = int(time.time())
+    claims = {
+        "iss": stub.issuer, "aud": settings.GOOGLE_CLIENT_ID, "sub": "42",
+        "iat": now, "exp": now + 300,
+    }
+    id_token = jwt.encode({"alg": "RS256", "kid": key.kid}, claims, key).decode()
+    return {"id_token": id_token, "access_token": "access"}
+
+async def test_startup_preloads_discovery_and_jwks(stub):
+    settings = make_settings(stub)
+    cache = ProviderMetadataCache(settings)
+    provider = OAuthProviderService(settings, cache)
+    await cache.start()
+    try:
+        assert stub.hits == {"/discovery": 1, "/jwks": 1}
+        # Les clients Authlib lisent le cache sans nouvel appel réseau
+        metadata = await provider.get_oauth().google.load_server_metadata()
+        assert metadata["issuer"] == stub.issuer
+        assert (await provider.get_oauth().google.fetch_jwk_set())["keys"][0]["kid"] == "old"
+        assert stub.hits == {"/discovery": 1, "/jwks": 1}
+    finally:
+        await cache.stop()
+
+async def test_eager_container_startup_preloads_the_providers(stub, database):
+    container = Container(make_settings(stub).model_copy(update={"STARTUP_MODE": "eager"}))
+    await container.startup()
+    try:
+        assert sorted(container.provider_metadata.sources) == ["github", "google"]
+        assert stub.hits == {"/discovery": 1, "/jwks": 1}
+    finally:
+        await container.shutdown()
+
+async def test_stale_entry_is_served_when_the_provider_fails(stub):
+    settings = make_settings(stub, ttl=0.2)
+    cache = ProviderMetadataCache(settings)
+    OAuthProviderService(settings, cache)
+    await cache.refresh("google")
+    stub.failing = True
+    await asyncio.sleep(0.25)
+
+    metadata = await cache.get_metadata("google")
+    assert metadata["issuer"] == stub.issuer
+    # Le rafraîchissement a bien été tenté
+    assert stub.hits["/discovery"] == 2
+    await cache.stop()
+
+async def test_expired_entry_is_refreshed_after_the_ttl(stub):
+    settings = make_settings(stub, ttl=0.2)
+    cache = ProviderMetadataCache(settings)
+    OAuthProviderService(settings, cache)
+    await cache.refresh("google")
+    stub.issuer = "https://rotated.test"
+
+    # Dans la TTL : entrée en cache
+    assert (await cache.get_metadata("google"))["issuer"] == "https://issuer.test"
+    await asyncio.sleep(0.25)
+    assert (await cache.get_metadata("google"))["issuer"] == "https://rotated.test"
+    assert stub.hits["/discovery"] == 2
+    await cache.stop()
+
+async def test_background_loop_refreshes_every_half_ttl(stub):
+    settings = make_settings(stub, ttl=0.2)
+    cache = ProviderMetadataCache(settings)
+    OAuthProviderService(settings, cache)
+    await cache.start()
+    try:
+        await asyncio.sleep(0.35)
+        assert stub.hits["/discovery"] >= 2
+    finally:
+        await cache.stop()
+
+async def test_unknown_kid_forces_one_jwks_refresh_per_window(stub):
+    settings = make_settings(stub, min_refresh=0.5)
+    cache = ProviderMetadataCache(settings)
+    google = OAuthProviderService(settings, cache).get_oauth().google
+    await cache.start()
+    try:
+        # Rotation des clés chez le provider après le préchargement
+        new_key = make_key("new")
+        stub.keys = [stub.keys[0], new_key]
+        await asyncio.sleep(0.5)
+
+        userinfo = await google.parse_id_token(make_id_token(stub, new_key, settings), nonce=None)
+        assert userinfo["sub"] == "42"
+        assert stub.hits["/jwks"] == 2
+        assert cache.forced_refreshes == 1
+
+        # Autre kid inconnu dans la même fenêtre : pas de nouvel appel au provider
+        with pytest.raises(ValueError):
+            await google.parse_id_token(make_id_token(stub, make_key("unknown"), settings), nonce=None)
+        assert stub.hits["/jwks"] == 2
+        assert cache.forced_refreshes == 2
+    finally:
+        await cache.stop()
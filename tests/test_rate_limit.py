@@ -0,0 +1,94 @@
+"""Les deux backends du limiteur de connexion prennent les mêmes décisions"""
+import pytest
+from app.core.config import get_settings
+from app.core.errors import RateLimitExceeded
+from app.services import rate_limit
+from app.services.rate_limit import LoginRateLimiter, MemoryRateLimitBackend, MongoRateLimitBackend
+from tests.fakes import FakeDatabase
+
+pytestmark = pytest.mark.anyio
+
+WINDOW = 60
+LIMIT = 5
+
+class Clock():
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1_000 * WINDOW)
+    monkeypatch.setattr(rate_limit, "_now", clock)
+    return clock
+
+async def decisions(backend, clock: Clock, schedule: list[tuple[float, int]]) -> list[bool]:
+    """`schedule` : (secondes depuis le début, nombre de tentatives)"""
+    start = clock.now
+    results = []
+    for offset, attempts in schedule:
+        clock.now = start + offset
+        for _ in range(attempts):
+            allowed, retry_after = await backend.hit("email:a@example.com", LIMIT, WINDOW)
+            assert allowed or retry_after > 0
+            results.append(allowed)
+    return results
+
+SCHEDULE = [(0, 8), (30, 3), (65, 4), (90, 6), (200, 2)]
+
+async def test_mongo_backend_matches_memory_backend(clock):
+    expected = await decisions(MemoryRateLimitBackend(max_keys=10), clock, SCHEDULE)
+    clock.now = 1_000 * WINDOW
+    actual = await decisions(MongoRateLimitBackend(FakeDatabase()), clock, SCHEDULE)
+    assert actual == expected
+    assert expected.count(True) < len(expected)
+
+async def test_rejected_attempts_are_not_counted(clock):
+    database = FakeDatabase()
+    backend = MongoRateLimitBackend(database)
+    await decisions(backend, clock, [(0, LIMIT + 20)])
+    document = database["rate_limits"].documents[0]
+    assert document["current"] == LIMIT
+
+    # Milieu de la fenêtre suivante : 5 * 0.5 < 5, quand 25 * 0.5 bloquerait encore
+    clock.now += WINDOW * 1.5
+    assert (await backend.hit("email:a@example.com", LIMIT, WINDOW))[0]
+
+async def test_one_round_trip_per_hit(clock):
+    database = FakeDatabase()
+    backend = MongoRateLimitBackend(database)
+    await decisions(backend, clock, [(0, 3), (WINDOW * 1.5, 3)])
+    assert database.operations == 6
+
+@pytest.mark.parametrize("header_setting, proxies, forwarded, expected", [
+    (None, 1, "203.0.113.9", "10.0.0.1"),
+    ("X-Forwarded-For", 1, "198.51.100.7, 203.0.113.9", "203.0.113.9"),
+    ("X-Forwarded-For", 2, "198.51.100.7, 203.0.113.9, 10.0.0.2", "203.0.113.9"),
+    ("X-Forwarded-For", 2, "203.0.113.9", "10.0.0.1"),
+])
+def test_client_ip_comes_from_the_trusted_proxy_header(header_setting, proxies, forwarded, expected):
+    settings = get_settings().model_copy(update={"CLIENT_IP_HEADER": header_setting, "CLIENT_IP_TRUSTED_PROXIES": proxies})
+    limiter = LoginRateLimiter(settings, FakeDatabase())
+    assert limiter.client_ip({"X-Forwarded-For": forwarded}, "10.0.0.1") == expected
+
+@pytest.mark.parametrize("backend", ["memory", "mongo"])
+async def test_attempts_rejected_on_the_email_do_not_use_the_ip_budget(clock, backend):
+    settings = get_settings().model_copy(update={
+        "LOGIN_RATE_LIMIT_ENABLED": True, "LOGIN_RATE_LIMIT_BACKEND": backend,
+        "LOGIN_RATE_LIMIT_PER_IP": 5, "LOGIN_RATE_LIMIT_PER_EMAIL": 2,
+    })
+    limiter = LoginRateLimiter(settings, FakeDatabase())
+    for attempt in range(6):
+        if attempt < 2:
+            await limiter.check("203.0.113.9", "victim@example.com")
+        else:
+            with pytest.raises(RateLimitExceeded):
+                await limiter.check("203.0.113.9", "victim@example.com")
+
+    # Seules les 2 tentatives autorisées pèsent sur l'IP : 3 autres emails passent encore
+    for other in range(3):
+        await limiter.check("203.0.113.9", f"user{other}@example.com")
+    with pytest.raises(RateLimitExceeded):
+        await limiter.check("203.0.113.9", "user3@example.com")
@@ -0,0 +1,72 @@
+"""Rotation des refresh tokens : réutilisation, compte désactivé, déconnexion"""
+import uuid
+import httpx
+import pytest
+from tests.conftest import make_client
+
+pytestmark = pytest.mark.anyio
+
+async def login(client: httpx.AsyncClient) -> tuple[str, str]:
+    """Crée un compte, se connecte et retourne (email, refresh token)"""
+    email = f"refresh-{uuid.uuid4().hex}@test.local"
+    credentials = {"email": email, "password": "correct horse"}
+    assert (await client.post("/auth/register", json=credentials)).status_code == 200
+    resp = await client.post("/auth/token", json=credentials)
+    assert resp.status_code == 200
+    return email, resp.cookies["refresh_token"]
+
+async def refresh(app, token: str) -> httpx.Response:
+    """Présente `token` depuis un client neuf, comme le ferait un attaquant"""
+    async with make_client(app) as client:
+        client.cookies.set("refresh_token", token)
+        return await client.post("/auth/refresh")
+
+def family_size(database, family_id: str) -> int:
+    return sum(1 for document in database["refresh_tokens"].documents if document["family_id"] == family_id)
+
+def only_family(database) -> str:
+    families = {document["family_id"] for document in database["refresh_tokens"].documents}
+    assert len(families) == 1
+    return families.pop()
+
+async def test_rotation_issues_a_new_token_in_the_same_family(app, client, database):
+    _, first = await login(client)
+    family = only_family(database)
+    resp = await refresh(app, first)
+    assert resp.status_code == 200
+    assert resp.cookies["refresh_token"] != first
+    assert family_size(database, family) == 2
+
+async def test_reused_token_revokes_the_whole_family(app, client, database):
+    _, first = await login(client)
+    family = only_family(database)
+    second = (await refresh(app, first)).cookies["refresh_token"]
+
+    assert (await refresh(app, first)).status_code == 401
+    assert family_size(database, family) == 0
+    # Le token légitime émis par la rotation est révoqué avec le reste de la famille
+    assert (await refresh(app, second)).status_code == 401
+
+@pytest.mark.parametrize("change", ["disable", "delete"])
+async def test_refresh_is_refused_for_a_disabled_or_deleted_user(app, client, database, change):
+    email, token = await login(client)
+    family = only_family(database)
+    users = database["users"]
+    if change == "disable":
+        await users.update_one({"email": email}, {"$set": {"disabled": True}})
+    else:
+        await users.delete_one({"email": email})
+
+    resp = await refresh(app, token)
+    assert resp.status_code == 401
+    assert family_size(database, family) == 0
+
+async def test_logout_revokes_the_family(app, client, database):
+    _, first = await login(client)
+    family = only_family(database)
+    second = (await refresh(app, first)).cookies["refresh_token"]
+    client.cookies.set("refresh_token", second)
+
+    assert (await client.post("/auth/logout")).status_code == 200
+    assert family_size(database, family) == 0
+    assert (await refresh(app, second)).status_code == 401
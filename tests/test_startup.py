@@ -0,0 +1,94 @@
+"""Démarrage STARTUP_MODE=lazy avec un MongoDB pas encore joignable"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core.config import get_settings
+from app.core.container import Container
+from app.services.jobs import RevocationQueue
+from tests.conftest import make_client
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def settings():
+    return get_settings().model_copy(update={"STARTUP_MODE": "lazy", "REVOCATION_RETRY_BASE_SECONDS": 0.01})
+
+@pytest.fixture
+async def container(database, settings, monkeypatch):
+    monkeypatch.setattr(Container, "startup_retry_base", 0.01)
+    container = Container(settings)
+    yield container
+    await container.shutdown()
+
+async def test_index_creation_is_retried_until_it_succeeds(container, database):
+    database.failures["create_index"] = 3
+    await container.startup()
+
+    # Les workers en mémoire n'attendent pas MongoDB
+    assert container.revocations.tasks and not any(task.done() for task in container.revocations.tasks)
+    assert not container.startup_task.done()
+
+    await asyncio.wait_for(container.startup_task, timeout=2)
+    assert database.failures["create_index"] == 0
+    assert "email_unique" in database["users"].indexes
+    assert "expires_at_ttl" in database["refresh_tokens"].indexes
+    assert "status_locked_until" in database["revocation_outbox"].indexes
+
+async def test_orphan_claiming_backs_off_instead_of_waiting_a_full_interval(database, settings):
+    revocations = RevocationQueue(settings, database, lambda: None)
+    await database["revocation_outbox"].insert_one({
+        "provider": "github", "token": "t", "status": "pending", "attempts": 0,
+        "locked_until": datetime.now(timezone.utc) - timedelta(minutes=1),
+    })
+    database.failures["find_one_and_update"] = 2
+
+    task = asyncio.create_task(revocations._recovery_loop())
+    try:
+        await asyncio.sleep(0.2)
+        assert revocations.queue.qsize() == 1
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+async def test_lazy_provider_metadata_starts_its_refresh_loop(container):
+    await container.startup()
+    assert "provider_metadata" not in container.__dict__
+
+    refresh_task = container.provider_metadata.refresh_task
+    assert refresh_task is not None and not refresh_task.done()
+    await container.shutdown()
+    assert refresh_task.cancelled()
+
+@pytest.fixture
+def lazy_main(monkeypatch):
+    """main:app, dont le lifespan démarrera en mode lazy avec des délais courts"""
+    from main import app
+    monkeypatch.setattr(get_settings(), "STARTUP_MODE", "lazy")
+    monkeypatch.setattr(get_settings(), "STARTUP_INDEX_WAIT_SECONDS", 0.2)
+    monkeypatch.setattr(Container, "startup_retry_base", 0.05)
+    return app
+
+async def register(client, email: str):
+    return await client.post("/auth/register", json={"email": email, "password": "correct horse"})
+
+async def test_account_creation_waits_for_the_unique_indexes(database, lazy_main):
+    database.failures["create_index"] = 10_000
+    async with lazy_main.router.lifespan_context(lazy_main), make_client(lazy_main) as client:
+        responses = await asyncio.gather(*(register(client, "same@test.local") for _ in range(2)))
+        assert [resp.status_code for resp in responses] == [503, 503]
+        assert database["users"].documents == []
+
+        # MongoDB redevient joignable : les index sont créés au prochain essai
+        database.failures["create_index"] = 0
+        await asyncio.wait_for(lazy_main.state.container.startup_task, timeout=2)
+        assert (await register(client, "same@test.local")).status_code == 200
+        assert (await register(client, "same@test.local")).status_code == 400
+
+async def test_existing_duplicates_are_not_retried_and_keep_refusing_writes(database, lazy_main):
+    await database["users"].insert_many([{"email": "dup@test.local"}, {"email": "dup@test.local"}])
+    async with lazy_main.router.lifespan_context(lazy_main), make_client(lazy_main) as client:
+        await asyncio.wait_for(lazy_main.state.container.startup_task, timeout=2)
+        assert "email_unique" not in database["users"].indexes
+
+        assert (await register(client, "new@test.local")).status_code == 503
+        assert (await client.get("/health")).json()["user_indexes_ready"] is False
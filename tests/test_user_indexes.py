@@ -0,0 +1,54 @@
+import pytest
+from app.repositories.user import DuplicateEmailsError, DuplicateProviderIdentitiesError, UserRepository
+from tests.fakes import FakeDatabase
+
+pytestmark = pytest.mark.anyio
+
+async def test_duplicate_emails_block_the_unique_index_with_the_conflicting_emails():
+    database = FakeDatabase()
+    users = database.get_users_collection()
+    # Compte local puis connexion Google avec le même email (anciens callbacks)
+    await users.insert_one({"email": "dup@example.com", "password": "hash"})
+    await users.insert_one({"email": "dup@example.com", "provider": "google", "provider_id": "42"})
+    await users.insert_one({"email": "solo@example.com"})
+
+    repository = UserRepository(database)
+    with pytest.raises(DuplicateEmailsError) as error:
+        await repository.ensure_indexes()
+    assert error.value.emails == ["dup@example.com"]
+    assert "dup@example.com" in str(error.value)
+    assert "email_unique" not in await users.index_information()
+
+    # Après dédoublonnage, le démarrage crée l'index
+    await users.delete_one({"provider": "google"})
+    await repository.ensure_indexes()
+    assert "email_unique" in await users.index_information()
+
+async def test_existing_index_skips_the_duplicate_scan():
+    database = FakeDatabase()
+    repository = UserRepository(database)
+    await repository.ensure_indexes()
+
+    async def fail(pipeline):
+        raise AssertionError("aggregate ne doit pas être appelé")
+    database.get_users_collection().aggregate = fail
+    await repository.ensure_indexes()
+
+async def test_duplicate_provider_identities_block_their_unique_index():
+    database = FakeDatabase()
+    users = database.get_users_collection()
+    # Deux callbacks GitHub concurrents (find_one puis insert_one), emails différents
+    await users.insert_one({"email": "octo@github.com", "provider": "github", "provider_id": "7"})
+    await users.insert_one({"email": "octo@example.com", "provider": "github", "provider_id": "7"})
+    await users.insert_one({"email": "local@example.com"})
+
+    repository = UserRepository(database)
+    with pytest.raises(DuplicateProviderIdentitiesError) as error:
+        await repository.ensure_indexes()
+    assert error.value.identities == [("github", "7")]
+    assert "github:7" in str(error.value)
+    assert not repository.indexes_ready.is_set()
+
+    await users.delete_one({"email": "octo@example.com"})
+    await repository.ensure_indexes()
+    assert "provider_identity_unique" in await users.index_information()
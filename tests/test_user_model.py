@@ -0,0 +1,32 @@
+"""Construction sans validation des profils lus dans MongoDB"""
+import warnings
+from datetime import datetime
+from app.models.user import User
+
+def legacy_document() -> dict:
+    # Abonnement écrit par l'ancien code, avant `--migrate-dates`
+    return {
+        "email": "legacy@example.com",
+        "abonnement": {
+            "type_abonnement": "premium",
+            "date_debut": "2024-01-01 10:00:00",
+            "date_fin": "2025-01-01 10:00:00",
+            "status": True,
+            "prix": 9.99,
+            "created_at": "2024-01-01 10:00:00",
+            "updated_at": None,
+        },
+    }
+
+def test_legacy_string_dates_are_serialized_without_warnings():
+    user = User.from_trusted(legacy_document())
+    assert isinstance(user.abonnement.date_fin, datetime)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        dumped = user.model_dump()
+    assert dumped["abonnement"]["date_debut"].tzinfo is not None
+
+def test_invalid_legacy_date_is_left_as_is():
+    document = legacy_document()
+    document["abonnement"]["date_fin"] = "bientôt"
+    assert User.from_trusted(document).abonnement.date_fin == "bientôt"